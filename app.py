@@ -1,10 +1,15 @@
+import json, os, threading
 import streamlit as st
-import pandas as pd
 
-from core.utils import extract_texts, load_skills, to_table_download
-from core.embedding import Embedder
-from core.extract import extract_profile
-from core.ranking import score_candidates, explain_candidate
+from core.utils import to_table_download
+from core.embedding import Embedder, warmup
+from core.cache import EmbeddingCache
+from core.store import CandidateStore
+from core.rarity import SkillStats, SKILL_STATS_PATH
+from core.dedup import Deduper
+from core.profiling import profile_run
+from core.skill_extractor import load_skill_index
+from core.ranking import rank_pool, add_skill_lists, explain_candidate, DEFAULT_WEIGHTS
 from core.visuals import plot_leaderboard, plot_skill_coverage, plot_radar
 
 st.set_page_config(page_title="AI Resume Analyzer", layout="wide")
@@ -20,55 +25,142 @@ with right:
 
 run = st.button("Analyze")
 
-if run and jd and uploads:
-    with st.spinner("Processing..."):
-        texts = extract_texts(uploads)
-        df = pd.DataFrame([{"candidate_id":k,"raw_text":v} for k,v in texts.items()])
-        skills = load_skills("models/skills_taxonomy.txt")
-        embedder = Embedder()
-
-        df_prof = df.apply(lambda r: extract_profile(r["raw_text"], skills), axis=1, result_type="expand")
-        df = pd.concat([df, df_prof], axis=1)
-
-        scores = score_candidates(df, jd, skills, embedder)
-
-        st.session_state.scores = scores
-        st.session_state.df = df
+with st.expander("Scoring weights"):
+    weights = {k: st.slider(k.capitalize(), 0.0, 1.0, v, 0.01) for k, v in DEFAULT_WEIGHTS.items()}
+    rarity_mode = st.radio("Skill rarity relative to", ["batch", "snapshot"], horizontal=True,
+                           format_func=lambda m: "this upload" if m == "batch" else "all candidates seen so far")
+
+perf_panel = st.expander("Performance")
+with perf_panel:
+    capture_cprofile = st.checkbox("Capture a cProfile of the next run (slower)")
+
+@st.cache_resource
+def embedding_cache():
+    return EmbeddingCache()
+
+@st.cache_resource
+def candidate_store():
+    return CandidateStore(stats=SkillStats(SKILL_STATS_PATH))
+
+# Loads the sentence-transformer once per server process, in the background so
+# the page renders before torch is imported; Embedder() waits for it if needed
+@st.cache_resource
+def start_warmup():
+    t = threading.Thread(target=warmup, daemon=True)
+    t.start()
+    return t
+
+start_warmup()
+
+# Uploads above this count are parsed on a process pool
+PARALLEL_MIN_FILES = 16
+# The chart and table only ever hold this many candidates
+LEADERBOARD_TOP = 50
+PAGE_SIZES = [25, 50, 100, 250]
+
+def upload_key(files, skills, rarity_mode):
+    return (skills.fingerprint, rarity_mode) + tuple((f.name, f.size, getattr(f, "file_id", "")) for f in files)
+
+with profile_run(cprofile=capture_cprofile) as prof:
+    if run and jd and uploads:
+        skills = load_skill_index()
+        key = upload_key(uploads, skills, rarity_mode)
+        # Parsing, profiles and embeddings only rerun when the uploads, taxonomy or rarity mode change
+        if st.session_state.get("pool_key") != key:
+            with st.spinner("Processing..."):
+                workers = os.cpu_count() if len(uploads) >= PARALLEL_MIN_FILES else None
+                embedder = Embedder(cache=embedding_cache(), tfidf_path=".cache/tfidf_state.npz")
+                # files already in the store (from any earlier session) are not parsed again;
+                # resubmitted CVs are dropped before profiling and never stored
+                store = candidate_store()
+                deduper = Deduper()
+                hashes = store.ingest(uploads, skills, embedder, workers=workers, deduper=deduper)
+                st.session_state.duplicates = deduper.report()
+                st.session_state.pool = store.pool(hashes, skills, embedder, rarity=rarity_mode)
+                st.session_state.embedder = embedder
+                st.session_state.pool_key = key
+                st.session_state.cache_stats = embedder.cache_stats()
+
+    # JD and weight edits only re-rank the cached pool; paging and picking a
+    # candidate reuse the last ranking. JD skill lists are built per shown row.
+    rank_key = (st.session_state.get("pool_key"), jd, tuple(weights.items()))
+    if "pool" in st.session_state and jd and st.session_state.get("rank_key") != rank_key:
+        st.session_state.scores = rank_pool(
+            st.session_state.pool, jd, load_skill_index(), st.session_state.embedder, weights=weights,
+            skill_lists=False
+        )
         st.session_state.jd = jd
+        st.session_state.rank_key = rank_key
+        st.session_state.csv = None
+
+# keep the last run that did real work (a full analysis, or a re-rank)
+if prof.spans:
+    st.session_state.perf = prof.to_dict()
+
+with perf_panel:
+    report = st.session_state.get("perf")
+    if report is None:
+        st.caption("Timings appear here after the first analysis.")
+    else:
+        import pandas as pd
+        st.caption(f"Last run: {report['wall_s']:.2f}s wall time")
+        st.dataframe(pd.DataFrame.from_dict(report["spans"], orient="index"))
+        st.dataframe(pd.Series(report["counters"], name="count"))
+        if "cprofile" in report:
+            st.dataframe(pd.DataFrame(report["cprofile"]))
+        st.download_button("Download timings JSON", data=json.dumps(report, indent=2), file_name="performance.json")
 
 if "scores" in st.session_state:
     scores = st.session_state.scores
 
     st.subheader("Ranked Candidates")
-    st.plotly_chart(plot_leaderboard(scores), use_container_width=True)
+    cs = st.session_state.get("cache_stats")
+    if cs:
+        st.caption(f"Embedding cache: {cs['hits']} hits, {cs['misses']} misses")
+    dups = st.session_state.get("duplicates")
+    if dups is not None and len(dups):
+        with st.expander(f"{len(dups)} duplicate resumes skipped"):
+            st.dataframe(dups)
+    jd_required = set(scores.attrs["jd_required"])
+    n = len(scores)
+
+    top_n = st.number_input("Candidates in chart", 1, n, min(n, LEADERBOARD_TOP))
+    st.plotly_chart(plot_leaderboard(scores.head(top_n)), use_container_width=True)
+
+    c1, c2 = st.columns(2)
+    page_size = c1.selectbox("Rows per page", PAGE_SIZES)
+    pages = -(-n // page_size)
+    page_no = c2.number_input("Page", 1, pages, 1)
+    start = (page_no - 1) * page_size
+    page = add_skill_lists(scores.iloc[start:start + page_size].copy(), jd_required)
 
     hide_cols = ["embedding","jd_embedding","raw_text","clean_text","skills_missing","jd_found_skills","years_experience","edu_score"]
-    df_show = scores.drop(columns=[c for c in hide_cols if c in scores.columns])
-
-    def color_cgpa(v):
-        try:
-            v = float(v)
-            return "color: green; font-weight: 600;" if v >= 8 else ""
-        except:
-            return ""
-
-    st.dataframe(df_show.style.applymap(color_cgpa, subset=["cgpa"]))
-
-    cols_to_drop = [c for c in ["embedding","jd_embedding","raw_text"] if c in scores.columns]
-    st.download_button(
-        "Download results CSV",
-        data=to_table_download(scores.drop(columns=cols_to_drop)),
-        file_name="resume_matches.csv"
-    )
+    df_show = page.drop(columns=[c for c in hide_cols if c in page.columns])
+
+    def color_cgpa(col):
+        import numpy as np
+        import pandas as pd
+        return np.where(pd.to_numeric(col, errors="coerce") >= 8, "color: green; font-weight: 600;", "")
+
+    st.caption(f"Candidates {start + 1}-{start + len(page)} of {n} (page {page_no} of {pages})")
+    st.dataframe(df_show.style.apply(color_cgpa, subset=["cgpa"]))
+
+    # the full CSV is only built when asked for, once per ranking
+    if st.session_state.get("csv") is None and st.button("Prepare results CSV"):
+        cols_to_drop = [c for c in ["embedding","jd_embedding","raw_text"] if c in scores.columns]
+        st.session_state.csv = to_table_download(add_skill_lists(scores.drop(columns=cols_to_drop), jd_required))
+    if st.session_state.get("csv") is not None:
+        st.download_button("Download results CSV", data=st.session_state.csv, file_name="resume_matches.csv")
 
     st.subheader("Insights")
 
     pick = st.selectbox(
         "Select a candidate",
-        scores["candidate_id"].tolist()
+        range(len(page)),
+        format_func=lambda i: page["candidate_id"].iat[i]
     )
 
-    row = scores[scores["candidate_id"] == pick].iloc[0]
+    row = page.iloc[pick]
 
     st.plotly_chart(plot_skill_coverage(row["jd_found_skills"], row["jd_missing_skills"]))
     st.plotly_chart(plot_radar(row), use_container_width=True)
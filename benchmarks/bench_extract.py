@@ -0,0 +1,29 @@
+# Time extract_profile per resume on a synthetic corpus.
+#   python -m benchmarks.bench_extract --docs 1000 --words 900
+import argparse, statistics, time
+from core.extract import extract_profile
+from core.skill_extractor import load_skill_index
+from benchmarks.corpus import synthetic_corpus
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=1000)
+    ap.add_argument("--words", type=int, default=900)
+    args = ap.parse_args()
+
+    idx = load_skill_index()
+    docs = synthetic_corpus(args.docs, words=args.words)
+    lat = []
+    t0 = time.perf_counter()
+    for d in docs:
+        s = time.perf_counter()
+        extract_profile(d, idx)
+        lat.append(time.perf_counter() - s)
+    total = time.perf_counter() - t0
+    lat.sort()
+    print(f"docs={args.docs} words/doc={args.words}")
+    print(f"total {total:.3f}s  {args.docs / total:.0f} docs/s")
+    print(f"p50 {statistics.median(lat) * 1e3:.2f}ms  p95 {lat[int(0.95 * (len(lat) - 1))] * 1e3:.2f}ms")
+
+if __name__ == "__main__":
+    main()
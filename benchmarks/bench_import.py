@@ -0,0 +1,58 @@
+# Cold-start import time, each target in a fresh interpreter (median of --repeat runs).
+#   python -m benchmarks.bench_import
+#   python -m benchmarks.bench_import --budget 0.5
+# "app" is the import set app.py needs before its first render. Heavy stacks
+# (pandas, sklearn, scipy, torch, plotly, PDF/DOCX readers) must stay unloaded
+# until first use; the script exits non-zero if any target is over budget or
+# pulls one of them in.
+import argparse, json, statistics, subprocess, sys
+
+APP_MODULES = ["streamlit", "core.utils", "core.embedding", "core.cache", "core.store", "core.rarity", "core.dedup",
+               "core.profiling", "core.skill_extractor", "core.ranking", "core.visuals"]
+TARGETS = {
+    "app": APP_MODULES,
+    "core": [m for m in APP_MODULES if m != "streamlit"],
+    "cli": ["cli"],
+}
+# streamlit itself imports plotly; cli writes pandas output, so pandas is allowed there
+HEAVY = {
+    "app": ["pandas", "sklearn", "scipy", "torch", "sentence_transformers", "PyPDF2", "docx"],
+    "core": ["pandas", "sklearn", "scipy", "torch", "sentence_transformers", "plotly", "PyPDF2", "docx"],
+    "cli": ["sklearn", "scipy", "torch", "sentence_transformers", "plotly", "PyPDF2", "docx"],
+}
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+for m in {mods!r}:
+    __import__(m)
+dt = time.perf_counter() - t
+print(json.dumps({{"seconds": dt, "loaded": [h for h in {heavy!r} if h in sys.modules]}}))
+"""
+
+def measure(mods, heavy, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(mods=mods, heavy=heavy)],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return statistics.median(r["seconds"] for r in runs), runs[-1]["loaded"]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--targets", default=",".join(TARGETS))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=0.6, help="seconds allowed per target")
+    args = ap.parse_args()
+
+    ok = True
+    for name in args.targets.split(","):
+        secs, loaded = measure(TARGETS[name], HEAVY[name], args.repeat)
+        over = secs > args.budget or loaded
+        ok &= not over
+        extra = f"  eagerly loaded: {', '.join(loaded)}" if loaded else ""
+        print(f"{name:<6} {secs * 1e3:8.1f}ms  budget {args.budget * 1e3:.0f}ms  {'OVER' if over else 'ok'}{extra}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Compare the token-trie skill matcher with the n-gram dictionary lookup it replaced.
+#   python -m benchmarks.bench_skill_matcher --docs 500 --words 4000
+import argparse, time
+from core.skill_extractor import build_skill_index, compile_skill_matcher, extract_skills_whitelist, _ngrams, _norm
+from core.utils import load_skills
+from benchmarks.corpus import synthetic_corpus
+
+def ngram_extract(text, skill_index, n_max=4):
+    toks = [x for x in _norm(text).split() if x]
+    found = set()
+    for g in _ngrams(toks, n_max=n_max):
+        if g in skill_index:
+            found.add(skill_index[g])
+    return sorted(found, key=lambda s: s.lower())
+
+def timed(fn, docs):
+    t0 = time.perf_counter()
+    res = [fn(d) for d in docs]
+    return time.perf_counter() - t0, res
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=500)
+    ap.add_argument("--words", type=int, default=4000)
+    args = ap.parse_args()
+
+    skills = load_skills("models/skills_taxonomy.txt")
+    idx = build_skill_index(skills)
+    matcher = compile_skill_matcher(idx)
+    docs = synthetic_corpus(args.docs, skills, words=args.words)
+
+    t_old, old = timed(lambda d: ngram_extract(d, idx), docs)
+    t_new, new = timed(lambda d: extract_skills_whitelist(d, matcher), docs)
+    assert old == new, "matcher output differs from n-gram lookup"
+
+    print(f"docs={args.docs} words/doc={args.words} skills={len(idx)}")
+    print(f"ngram lookup : {t_old:.3f}s ({args.docs / t_old:.0f} docs/s)")
+    print(f"token trie   : {t_new:.3f}s ({args.docs / t_new:.0f} docs/s)")
+    print(f"speedup      : {t_old / t_new:.2f}x")
+
+if __name__ == "__main__":
+    main()
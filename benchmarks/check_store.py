@@ -0,0 +1,77 @@
+# Round-trips a PDF, a DOCX and a TXT resume through CandidateStore.sync and
+# CandidateStore.ingest and checks the stored text came from the right reader,
+# then checks that with a Deduper the same CV as PDF and TXT is stored once.
+#   python -m benchmarks.check_store
+import os, sys, tempfile
+
+TEXT = "Jane Roe jane.roe@example.com Skills: python, docker, kubernetes"
+
+def make_pdf(text):
+    # one page, Helvetica, text drawn with Tj; enough for PyPDF2's extractor
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+            b"/Resources << /Font << /F1 5 0 R >> >> >>",
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, o in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + o + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+def make_docx(text):
+    import io, docx
+    d = docx.Document()
+    d.add_paragraph(text.replace("jane", "john").replace("Jane", "John"))
+    buf = io.BytesIO()
+    d.save(buf)
+    return buf.getvalue()
+
+def check(texts, label):
+    ok = True
+    for name, t in sorted(texts.items()):
+        good = "kubernetes" in t.lower() and not t.startswith(("%PDF", "PK"))
+        ok &= good
+        print(f"{label:<7} {name:<12} {'ok' if good else 'BAD'}  {t[:60]!r}")
+    return ok
+
+def check_dedup(d, pdf, skills):
+    from core.dedup import Deduper
+    from core.rarity import SkillStats
+    from core.store import CandidateStore
+    store = CandidateStore(os.path.join(d, "dedup.sqlite"), stats=SkillStats())
+    deduper = Deduper()
+    hashes = store.ingest([("a.pdf", pdf), ("a.txt", TEXT.encode())], skills, deduper=deduper)
+    ok = list(hashes) == ["a.pdf"] and len(store) == 1 and len(store.stats) == 1 and len(deduper.pairs) == 1
+    print(f"dedup   {'ok' if ok else 'BAD'}  kept {list(hashes)}, {len(store)} stored, {deduper.pairs}")
+    return ok
+
+def main():
+    from core.store import CandidateStore
+    from core.skill_extractor import load_skill_index
+    skills = load_skill_index()
+    files = {"a.pdf": make_pdf(TEXT), "b.docx": make_docx(TEXT), "c.txt": TEXT.replace("Jane", "Jim").encode()}
+    with tempfile.TemporaryDirectory() as d:
+        folder = os.path.join(d, "resumes")
+        os.makedirs(folder)
+        for name, data in files.items():
+            with open(os.path.join(folder, name), "wb") as fh:
+                fh.write(data)
+        store = CandidateStore(os.path.join(d, "sync.sqlite"))
+        store.sync(folder, skills)
+        ok = check(store.texts(store.files()), "sync")
+        store = CandidateStore(os.path.join(d, "ingest.sqlite"))
+        ok &= check(store.texts(store.ingest(list(files.items()), skills)), "ingest")
+        frame = store.frame(store.ingest(list(files.items()), skills), skills)
+        ok &= all({"python", "docker"} <= set(s) for s in frame["skills_found"])
+        ok &= check_dedup(d, files["a.pdf"], skills)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import random
+from core.utils import load_skills
+
+FILLER = (
+    "developed maintained designed implemented built led team project using "
+    "analysis pipeline system data model service users performance improved "
+    "responsible for the and with in of to a on across production reports"
+).split()
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+               "January", "August", "September", "Sept"]
+DEGREES = ["B.Tech in Computer Science", "Bachelor of Engineering", "M.Tech in Data Science",
+           "Master of Science", "Post Graduate Diploma", "Diploma in IT"]
+ROLES = ["Data Science Intern", "ML Engineer", "Software Developer", "Analyst", "Project Trainee"]
+
+def _date(rng, year):
+    style = rng.random()
+    month = rng.randint(1, 12)
+    if style < 0.6:
+        return f"{rng.choice(MONTH_NAMES)} {year}"
+    if style < 0.85:
+        return f"{month:02d}/{year}"
+    return f"{rng.randint(1, 28):02d}/{month:02d}/{year}"
+
+def _range(rng):
+    year = rng.randint(2016, 2025)
+    end = "Present" if rng.random() < 0.15 else _date(rng, min(2025, year + rng.randint(0, 1)))
+    return f"{_date(rng, year)} {rng.choice(['-', 'to', '–'])} {end}"
+
+def _cgpa(rng):
+    v = f"{rng.uniform(5.5, 9.9):.2f}"
+    return rng.choice([f"CGPA: {v}", f"{v} CGPA", f"GPA {v}", f"{v}/10", f"CGPA - {v}"])
+
+def _contacts(rng, i):
+    email = f"candidate.{i}@example{rng.randint(1, 9)}.com"
+    phone = f"+91 {rng.randint(6, 9)}{rng.randint(0, 9999):04d} {rng.randint(0, 99999):05d}"
+    return f"Email: {email} | Phone: {phone}"
+
+def _prose(rng, skills, words):
+    out = []
+    while len(out) < words:
+        if rng.random() < 0.08:
+            out.append(rng.choice(skills))
+        else:
+            out.append(rng.choice(FILLER))
+    return " ".join(out)
+
+def synthetic_resume(rng, skills, words=600, i=0):
+    lines = [f"Candidate {i}", _contacts(rng, i), "", "Education"]
+    lines.append(f"{rng.choice(DEGREES)}  {rng.randint(2015, 2024)}  {_cgpa(rng) if rng.random() < 0.7 else ''}")
+    lines.append("")
+    lines.append("Experience")
+    sections = max(1, words // 150)
+    for _ in range(sections):
+        if rng.random() < 0.8:
+            lines.append(f"{rng.choice(ROLES)}  {_range(rng)}")
+        else:
+            lines.append(f"Project work ({rng.randint(2, 11)} months) {rng.randint(2018, 2025)}")
+        lines.append(_prose(rng, skills, 150))
+    lines.append("Skills: " + ", ".join(rng.sample(skills, min(len(skills), rng.randint(4, 14)))))
+    return "\n".join(lines)
+
+def synthetic_corpus(n, skills=None, words=600, seed=0):
+    skills = skills or load_skills("models/skills_taxonomy.txt")
+    rng = random.Random(seed)
+    return [synthetic_resume(rng, skills, words, i) for i in range(n)]
+
+def to_txt(text):
+    return text.encode("utf-8")
+
+def to_docx(text):
+    import io
+    from docx import Document
+    doc = Document()
+    for line in text.split("\n"):
+        doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+def _pdf_escape(line):
+    line = line.encode("latin-1", errors="replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _wrap(line, width=95):
+    words, out, cur = line.split(" "), [], ""
+    for w in words:
+        if cur and len(cur) + len(w) + 1 > width:
+            out.append(cur)
+            cur = w
+        else:
+            cur = f"{cur} {w}" if cur else w
+    out.append(cur)
+    return out
+
+def to_pdf(text, lines_per_page=55):
+    # Minimal text-only PDF (Helvetica, one content stream per page) that PyPDF2 can extract
+    lines = [l for raw in text.split("\n") for l in _wrap(raw)]
+    pages = [lines[i:i+lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"] + [f"({_pdf_escape(l)}) Tj T*" for l in page] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+        content_id = len(objs)
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        body = obj if isinstance(obj, bytes) else obj.encode("latin-1")
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+WRITERS = {"txt": to_txt, "docx": to_docx, "pdf": to_pdf}
+
+def synthetic_files(n, formats=("txt", "docx", "pdf"), words=600, seed=0):
+    # (name, bytes) pairs cycling through the requested formats, ready for extract_texts
+    docs = synthetic_corpus(n, words=words, seed=seed)
+    return [(f"resume_{i:06d}.{formats[i % len(formats)]}", WRITERS[formats[i % len(formats)]](d))
+            for i, d in enumerate(docs)]
+
+def write_corpus(directory, n, formats=("txt", "docx", "pdf"), words=600, seed=0):
+    import os
+    os.makedirs(directory, exist_ok=True)
+    for name, data in synthetic_files(n, formats, words, seed):
+        with open(os.path.join(directory, name), "wb") as fh:
+            fh.write(data)
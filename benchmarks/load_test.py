@@ -0,0 +1,119 @@
+# Load test for service.py: N concurrent keep-alive clients POST /rank with
+# synthetic resumes, then report requests/s, latency percentiles and errors.
+#   python -m service --port 8080 &
+#   python -m benchmarks.load_test --port 8080 --requests 500 --concurrency 32
+#   python -m benchmarks.load_test --spawn --requests 200      # starts its own service
+import argparse, asyncio, json, random, statistics, subprocess, sys, time
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+async def _request(reader, writer, host, body):
+    writer.write((f"POST /rank HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    size = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        if k.lower() == "content-length":
+            size = int(v)
+    await reader.readexactly(size)
+    return status
+
+async def _client(host, port, bodies, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while bodies:
+            body = bodies.pop()
+            t = time.perf_counter()
+            try:
+                status = await _request(reader, writer, host, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                statuses["conn_error"] = statuses.get("conn_error", 0) + 1
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+                continue
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - t)
+    finally:
+        writer.close()
+
+def make_bodies(n, per_request, words, top_k, seed=0):
+    from benchmarks.corpus import synthetic_corpus
+    from core.skill_extractor import load_skill_index
+    skills = load_skill_index().skills
+    docs = synthetic_corpus(max(per_request * 4, 64), skills, words=words, seed=seed)
+    rng = random.Random(seed)
+    bodies = []
+    for i in range(n):
+        picked = rng.sample(range(len(docs)), per_request)
+        jd = "Looking for " + ", ".join(rng.sample(skills, 8)) + " experience"
+        req = {"jd": jd, "top_k": top_k, "resumes": [{"id": f"r{j}", "text": docs[j]} for j in picked]}
+        bodies.append(json.dumps(req).encode("utf-8"))
+    return bodies
+
+async def _health(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /health HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b"\r\n\r\n", 1)[1])
+
+async def _wait_ready(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await _health(host, port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+async def run(args):
+    bodies = make_bodies(args.requests, args.resumes, args.words, args.top_k)
+    await _wait_ready(args.host, args.port)
+    latencies, statuses = [], {}
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_client(args.host, args.port, bodies, latencies, statuses)
+                           for _ in range(args.concurrency)])
+    wall = time.perf_counter() - t0
+    ok = statuses.get(200, 0)
+    print(f"{args.requests} requests x {args.resumes} resumes, concurrency {args.concurrency}")
+    print(f"  {ok / wall:.1f} req/s  {ok * args.resumes / wall:.0f} resumes/s  ({wall:.2f}s)")
+    if latencies:
+        print(f"  latency p50 {statistics.median(latencies) * 1e3:.1f}ms  p95 {_percentile(latencies, 0.95) * 1e3:.1f}ms"
+              f"  p99 {_percentile(latencies, 0.99) * 1e3:.1f}ms  max {max(latencies) * 1e3:.1f}ms")
+    print(f"  status counts: {dict(sorted(statuses.items(), key=str))}")
+    print(f"  batcher: {(await _health(args.host, args.port))['batcher']}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--resumes", type=int, default=20, help="resumes per request")
+    ap.add_argument("--words", type=int, default=400)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--spawn", action="store_true", help="start service.py for the duration of the test")
+    args, service_args = ap.parse_known_args()
+
+    proc = None
+    if args.spawn:
+        proc = subprocess.Popen([sys.executable, "-m", "service", "--host", args.host, "--port", str(args.port),
+                                 *service_args])
+    try:
+        asyncio.run(run(args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Pipeline benchmark: ingestion, extract_profile, skill matching, Embedder.encode
+# and score_candidates on synthetic TXT/DOCX/PDF resumes.
+#   python -m benchmarks.run --sizes 100,1000,10000
+#   python -m benchmarks.run --sizes 1000 --compare benchmarks/results/<previous>.json
+# Each size runs in its own subprocess so peak RSS is per size.
+import argparse, json, os, platform, resource, statistics, subprocess, sys, time
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def _stage(name, n, total, latencies):
+    return {
+        "stage": name,
+        "items": n,
+        "seconds": round(total, 4),
+        "throughput_per_s": round(n / total, 2) if total else None,
+        "p50_ms": round(statistics.median(latencies) * 1e3, 3) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 0.95) * 1e3, 3) if latencies else None,
+    }
+
+def _timed_each(fn, items):
+    lat, out = [], []
+    t0 = time.perf_counter()
+    for it in items:
+        s = time.perf_counter()
+        out.append(fn(it))
+        lat.append(time.perf_counter() - s)
+    return time.perf_counter() - t0, lat, out
+
+def _peak_rss_mb():
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / 1024 if sys.platform != "darwin" else kb / 2**20, 1)
+
+def run_size(n, words, formats, encode_batch, seed=0):
+    import pandas as pd
+    from benchmarks.corpus import synthetic_files
+    from core.utils import read_bytes
+    from core.extract import extract_profile
+    from core.skill_extractor import load_skill_index, extract_skills_whitelist
+    from core.embedding import Embedder
+    from core.ranking import score_candidates
+
+    files = synthetic_files(n, formats=formats, words=words, seed=seed)
+    skills = load_skill_index()
+    stages = []
+
+    total, lat, texts = _timed_each(lambda f: read_bytes(*f), files)
+    stages.append(_stage("ingestion", n, total, lat))
+
+    total, lat, profiles = _timed_each(lambda t: extract_profile(t, skills), texts)
+    stages.append(_stage("extract_profile", n, total, lat))
+    df = pd.DataFrame(profiles)
+    df.insert(0, "candidate_id", [name for name, _ in files])
+
+    # fuzzy=True is what extract_profile runs; the exact-only pass is kept for comparison
+    total, lat, _ = _timed_each(lambda t: extract_skills_whitelist(t, skills, fuzzy=True), df["clean_text"].tolist())
+    stages.append(_stage("skill_matching", n, total, lat))
+    total, lat, _ = _timed_each(lambda t: extract_skills_whitelist(t, skills), df["clean_text"].tolist())
+    stages.append(_stage("skill_exact", n, total, lat))
+
+    embedder = Embedder()
+    clean = df["clean_text"].tolist()
+    batches = [clean[i:i+encode_batch] for i in range(0, n, encode_batch)]
+    total, lat, _ = _timed_each(embedder.encode, batches)
+    st = _stage("embedding_encode", n, total, [l / len(b) for l, b in zip(lat, batches)])
+    st["backend"] = "sentence-transformers" if embedder.model else "tfidf"
+    stages.append(st)
+
+    jd = "Looking for python, sql, docker, aws, pandas, tensorflow and nlp experience"
+    s = time.perf_counter()
+    score_candidates(df, jd, skills, Embedder())
+    stages.append(_stage("score_candidates", n, time.perf_counter() - s, []))
+
+    return {"size": n, "words_per_resume": words, "formats": list(formats),
+            "stages": stages, "peak_rss_mb": _peak_rss_mb()}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return ""
+
+def compare(current, previous):
+    prev = {(r["size"], s["stage"]): s for r in previous["results"] for s in r["stages"]}
+    print(f"\nvs {previous.get('commit') or '?'} ({previous.get('timestamp', '')})")
+    for r in current["results"]:
+        for s in r["stages"]:
+            p = prev.get((r["size"], s["stage"]))
+            if p and p["seconds"] and s["seconds"]:
+                change = (s["seconds"] - p["seconds"]) / p["seconds"] * 100
+                print(f"  {r['size']:>6} {s['stage']:<18} {p['seconds']:>9.3f}s -> {s['seconds']:>9.3f}s ({change:+.1f}%)")
+
+def report(results):
+    for r in results:
+        print(f"\n{r['size']} resumes  (peak RSS {r['peak_rss_mb']} MB)")
+        for s in r["stages"]:
+            p = f"p50 {s['p50_ms']:.2f}ms  p95 {s['p95_ms']:.2f}ms" if s["p50_ms"] is not None else ""
+            print(f"  {s['stage']:<18} {s['seconds']:>9.3f}s  {s['throughput_per_s'] or 0:>10.1f}/s  {p}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000")
+    ap.add_argument("--words", type=int, default=600)
+    ap.add_argument("--formats", default="txt,docx,pdf")
+    ap.add_argument("--encode-batch", type=int, default=64)
+    ap.add_argument("--out", default=None, help="results JSON (default: benchmarks/results/<time>-<commit>.json)")
+    ap.add_argument("--compare", default=None, help="previous results JSON to diff against")
+    ap.add_argument("--single", type=int, default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    formats = tuple(args.formats.split(","))
+
+    if args.single is not None:
+        print(json.dumps(run_size(args.single, args.words, formats, args.encode_batch)))
+        return
+
+    results = []
+    for n in [int(x) for x in args.sizes.split(",")]:
+        cmd = [sys.executable, "-m", "benchmarks.run", "--single", str(n), "--words", str(args.words),
+               "--formats", args.formats, "--encode-batch", str(args.encode_batch)]
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        report(results[-1:])
+
+    doc = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{doc['commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, indent=2)
+    print(f"\nsaved {out}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            compare(doc, json.load(fh))
+
+if __name__ == "__main__":
+    main()
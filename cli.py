@@ -0,0 +1,247 @@
+import argparse, os, sys, time
+import pandas as pd
+
+from core.utils import extract_texts, list_resumes
+from core.embedding import Embedder, DEFAULT_MODEL
+from core.cache import EmbeddingCache
+from core.pipeline import profile_frame, encode_texts, stack_embeddings
+from core.skill_extractor import load_skill_index, TAXONOMY_PATH
+from core.ranking import CandidatePool, rank_pool
+from core.vectors import EmbeddingStore
+from core.dedup import Deduper
+from core.store import CandidateStore
+from core.sharding import ShardedRanker, partition
+from core.rarity import SkillStats, RARITY_MODES, SKILL_STATS_PATH
+from core.profiling import profile_run
+
+LIST_COLS = ["skills_found", "jd_found_skills", "jd_missing_skills"]
+
+def batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i+size]
+
+def read_batch(paths, root):
+    # candidate ids are paths relative to the resume folder so duplicates in subfolders stay distinct
+    items = []
+    for p in paths:
+        with open(p, "rb") as fh:
+            items.append((os.path.relpath(p, root), fh.read()))
+    return items
+
+def write_results(df, path):
+    ext = os.path.splitext(path)[1].lower()
+    # attrs (jd_required, ...) are ranking metadata, not output; parquet would try to store them as JSON
+    df = df.copy(deep=False)
+    df.attrs = {}
+    if ext == ".parquet":
+        df.to_parquet(path, index=False)
+    elif ext in (".jsonl", ".json"):
+        df.to_json(path, orient="records", lines=True)
+    else:
+        out = df.copy()
+        for c in LIST_COLS:
+            if c in out.columns:
+                out[c] = out[c].apply(lambda r: ", ".join(r) if isinstance(r, list) else r)
+        out.to_csv(path, index=False)
+
+def positive_int(value):
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+def non_negative_int(value):
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {n}")
+    return n
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+def skill_stats(args):
+    # snapshot scoring needs the running stats; --skill-stats alone just keeps them up to date
+    path = args.skill_stats or (SKILL_STATS_PATH if args.rarity == "snapshot" else None)
+    return SkillStats(path) if path else None
+
+def run(args):
+    with open(args.jd, "r", encoding="utf-8") as fh:
+        jd = fh.read()
+    skills = load_skill_index(args.taxonomy)
+    embedder = Embedder(args.model, cache=None if args.no_cache else EmbeddingCache(args.cache),
+                        tfidf_path=args.tfidf_state)
+    stats = skill_stats(args)
+    if args.store:
+        return run_store(args, jd, skills, embedder, stats)
+    if args.shards or args.shard_nodes:
+        return run_sharded(args, jd, stats)
+    paths = list_resumes(args.resumes)
+    log(f"{len(paths)} resumes in {args.resumes}")
+
+    # Stream batches through ingestion -> profile -> embedding; only the profile
+    # fields and embeddings are kept, raw and clean text are dropped per batch.
+    frames, embs = [], []
+    store = None
+    deduper = None if args.keep_duplicates else Deduper(threshold=args.dedup_threshold)
+    t0 = time.perf_counter()
+    done = 0
+    for batch in batches(paths, args.batch_size):
+        texts = extract_texts(read_batch(batch, args.resumes), workers=args.workers, timeout=args.timeout)
+        if deduper:
+            texts = deduper.filter(texts)
+        done += len(batch)
+        if not texts:
+            continue
+        df = profile_frame(texts, skills, workers=args.workers)
+        emb = encode_texts(embedder, df["clean_text"].tolist(), args.chunked, args.encode_batch)
+        if args.embedding_store and not hasattr(emb, "tocsr"):
+            # dense embeddings go to the memory-mapped store instead of RAM
+            if store is None:
+                try:
+                    store = EmbeddingStore(args.embedding_store, dim=emb.shape[1], dtype=args.quantize)
+                except ValueError as e:
+                    log(str(e))
+                    return 2
+            store.add(df["candidate_id"], emb)
+        else:
+            embs.append(emb)
+        if stats is not None:
+            stats.add_frame(df)
+        frames.append(df.drop(columns=["raw_text", "clean_text"]))
+        log(f"  {done}/{len(paths)} processed ({done / (time.perf_counter() - t0):.1f} resumes/s)")
+        if embedder.last_stats:
+            log(f"  encoded {embedder.last_stats['chunks']} chunks, {embedder.last_stats['tokens_per_s']} tokens/s")
+
+    if deduper and deduper.pairs:
+        log(f"skipped {len(deduper.pairs)} duplicate resumes in {len(deduper.clusters())} clusters")
+        if args.dedup_report:
+            deduper.report().to_csv(args.dedup_report, index=False)
+    if not frames:
+        log("no resumes found")
+        return 1
+    if stats is not None:
+        stats.save()
+    rarity = stats.snapshot() if args.rarity == "snapshot" else None
+    pool = CandidatePool(pd.concat(frames, ignore_index=True), store if store is not None else stack_embeddings(embs),
+                         rarity=rarity)
+    scores = rank_pool(pool, jd, skills, embedder, top_k=args.top_k)
+    write_results(scores, args.out)
+    log(f"wrote {len(scores)} ranked candidates to {args.out} in {time.perf_counter() - t0:.1f}s")
+    cs = embedder.cache_stats()
+    if cs:
+        log(f"embedding cache: {cs['hits']} hits, {cs['misses']} misses")
+    return 0
+
+def run_store(args, jd, skills, embedder, stats=None):
+    # Sync the folder into the candidate store (only new or changed files are
+    # parsed and embedded), then rank everything the store holds for it.
+    cands = CandidateStore(args.store, stats=stats)
+    # duplicates are dropped after parsing, before they are profiled, embedded or stored
+    deduper = None if args.keep_duplicates else Deduper(threshold=args.dedup_threshold)
+    st = cands.sync(args.resumes, skills, embedder, workers=args.workers, batch_size=args.batch_size,
+                    timeout=args.timeout, pooling=args.chunked, deduper=deduper)
+    log(f"synced {st['files']} resumes in {st['seconds']}s: {st['unchanged']} unchanged, "
+        f"{st['changed']} new or changed ({st['parsed']} parsed), {st['removed']} removed")
+    files = cands.files()
+    if not files:
+        log("no resumes found")
+        return 1
+    if deduper:
+        dropped = {dup for _, dup, _, _ in deduper.pairs}
+        files = {cid: h for cid, h in files.items() if cid not in dropped}
+        if deduper.pairs:
+            log(f"skipped {len(deduper.pairs)} duplicate resumes in {len(deduper.clusters())} clusters")
+            if args.dedup_report:
+                deduper.report().to_csv(args.dedup_report, index=False)
+    t0 = time.perf_counter()
+    pool = cands.pool(files, skills, embedder, pooling=args.chunked, rarity=args.rarity)
+    scores = rank_pool(pool, jd, skills, embedder, top_k=args.top_k)
+    write_results(scores.drop(columns=["clean_text"]), args.out)
+    log(f"wrote {len(scores)} ranked candidates to {args.out} in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+def run_sharded(args, jd, stats=None):
+    # Each shard parses, embeds and scores its slice of the folder in its own
+    # process (or node); only statistics and per-shard top-k lists come back.
+    paths = list_resumes(args.resumes)
+    log(f"{len(paths)} resumes in {args.resumes}")
+    config = dict(taxonomy=args.taxonomy, model=args.model, cache=None if args.no_cache else args.cache,
+                  tfidf_path=args.tfidf_state, pooling=args.chunked, stats=stats if args.rarity == "snapshot" else None)
+    if args.shard_nodes:
+        key = os.environ.get("SHARD_AUTHKEY")
+        if not key:
+            log("set SHARD_AUTHKEY to the key the shard nodes were started with")
+            return 2
+        nodes = [(h, int(p)) for h, p in (a.rsplit(":", 1) for a in args.shard_nodes.split(","))]
+        ranker = ShardedRanker.connect(nodes, key.encode(), **config)
+    else:
+        ranker = ShardedRanker.local(args.shards, **config)
+    t0 = time.perf_counter()
+    with ranker:
+        info = ranker.load(partition(paths, len(ranker)), root=args.resumes, dedup=not args.keep_duplicates,
+                           dedup_threshold=args.dedup_threshold, timeout=args.timeout)
+        log(f"{info['candidates']} candidates on {info['shards']} shards {info['sizes']}, "
+            f"{info['duplicates']} duplicates skipped ({time.perf_counter() - t0:.1f}s)")
+        if ranker.pairs and args.dedup_report:
+            pd.DataFrame(ranker.pairs, columns=["kept", "duplicate", "match", "similarity"]).to_csv(
+                args.dedup_report, index=False)
+        if not info["candidates"]:
+            log("no resumes found")
+            return 1
+        scores = ranker.rank(jd, top_k=args.top_k)
+    write_results(scores, args.out)
+    log(f"wrote {len(scores)} ranked candidates to {args.out} in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+def profiled(args):
+    if not args.profile:
+        return run(args)
+    with profile_run(cprofile=args.cprofile) as prof:
+        code = run(args)
+    prof.to_json(args.profile)
+    log(f"timings written to {args.profile}")
+    return code
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rank a folder of resumes against a job description.")
+    ap.add_argument("resumes", help="folder with PDF, DOCX or TXT resumes (searched recursively)")
+    ap.add_argument("--jd", required=True, help="job description text file")
+    ap.add_argument("--out", default="resume_matches.csv", help="output .csv, .parquet or .jsonl")
+    ap.add_argument("--batch-size", type=positive_int, default=500)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--timeout", type=float, default=30, help="per-file parse timeout in seconds")
+    ap.add_argument("--top-k", type=positive_int, default=None, help="only write the best K candidates")
+    ap.add_argument("--chunked", choices=["mean", "max"], default=None,
+                    help="embed whole resumes in chunks and pool them instead of truncating")
+    ap.add_argument("--encode-batch", type=positive_int, default=64)
+    ap.add_argument("--keep-duplicates", action="store_true",
+                    help="rank exact and near-duplicate resumes instead of skipping them")
+    ap.add_argument("--dedup-threshold", type=float, default=0.85,
+                    help="estimated Jaccard similarity above which resumes count as near duplicates")
+    ap.add_argument("--dedup-report", default=None, help="write the duplicate pairs to this CSV")
+    ap.add_argument("--rarity", choices=RARITY_MODES, default="batch",
+                    help="score skill rarity within this run (batch) or against all candidates seen so far (snapshot)")
+    ap.add_argument("--skill-stats", default=None,
+                    help=f"running skill frequency file (default {SKILL_STATS_PATH} with --rarity snapshot)")
+    ap.add_argument("--shards", type=non_negative_int, default=0,
+                    help="score the pool as N shards in worker processes and merge their top-k lists")
+    ap.add_argument("--shard-nodes", default=None,
+                    help="host:port,... of `python -m core.sharding` nodes (key in SHARD_AUTHKEY) instead of local shards")
+    ap.add_argument("--store", default=None,
+                    help="SQLite candidate store; only files added or changed since the last run are processed")
+    ap.add_argument("--embedding-store", default=None,
+                    help="keep dense embeddings in a memory-mapped store at this path prefix")
+    ap.add_argument("--quantize", choices=["float32", "float16", "int8"], default=None,
+                    help="storage type for a new --embedding-store (default float32); must match an existing one")
+    ap.add_argument("--taxonomy", default=TAXONOMY_PATH)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--cache", default=".cache/embeddings.sqlite")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--tfidf-state", default=".cache/tfidf_state.npz",
+                    help="document frequencies for the TF-IDF fallback when no sentence-transformer is available")
+    ap.add_argument("--profile", default=None, help="write per-stage timings and counters to this JSON file")
+    ap.add_argument("--cprofile", action="store_true", help="include a cProfile function table in --profile")
+    return profiled(ap.parse_args(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
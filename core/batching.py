@@ -0,0 +1,82 @@
+import asyncio
+
+class MicroBatcher:
+    # Merges concurrent submit() calls into one fn(list) call. A batch closes
+    # when max_batch items are queued or max_wait seconds after its first item;
+    # while fn runs, new submissions queue up and form the next batch.
+    # Batches run one at a time on `executor` (default: the loop's thread pool),
+    # so fn is never called concurrently; its result must be sliceable by row.
+    def __init__(self, fn, max_batch=128, max_wait=0.005, executor=None):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, items):
+        self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((list(items), fut))
+        return await fut
+
+    def stats(self):
+        return {"batches": self.batches, "items": self.items,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "queued": self._queue.qsize() if self._queue else 0}
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        n = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+        while n < self.max_batch:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                nxt = self._queue.get_nowait()
+            batch.append(nxt)
+            n += len(nxt[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            flat = [x for items, _ in batch for x in items]
+            try:
+                out = await loop.run_in_executor(self.executor, self.fn, flat)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(flat)
+            i = 0
+            for items, fut in batch:
+                if not fut.done():
+                    fut.set_result(out[i:i+len(items)])
+                i += len(items)
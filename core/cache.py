@@ -0,0 +1,73 @@
+import hashlib, os, sqlite3, threading, time
+import numpy as np
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+class EmbeddingCache:
+    def __init__(self, path=".cache/embeddings.sqlite", max_entries=200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT, key TEXT, dim INTEGER, vec BLOB, used REAL, "
+            "PRIMARY KEY (model, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings(used)")
+        self._db.commit()
+
+    def get_many(self, model_name, keys):
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i+500]
+                q = "SELECT key, vec FROM embeddings WHERE model=? AND key IN (%s)" % ",".join("?" * len(part))
+                for k, blob in self._db.execute(q, [model_name, *part]):
+                    found[k] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET used=? WHERE model=? AND key=?",
+                    [(now, model_name, k) for k in found],
+                )
+                self._db.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, model_name, items):
+        now = time.time()
+        rows = [(model_name, k, int(v.shape[-1]), np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?,?,?,?,?)", rows)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        n = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if n > self.max_entries:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY used ASC LIMIT ?)",
+                (n - self.max_entries,),
+            )
+
+    def stats(self):
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": n,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM embeddings")
+            self._db.commit()
+            self.hits = self.misses = 0
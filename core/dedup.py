@@ -0,0 +1,112 @@
+import re, zlib
+import numpy as np
+from core.cache import text_hash
+from core.profiling import span
+
+_WORD = re.compile(r"\w+")
+
+def _normalize(text):
+    return " ".join(_WORD.findall(text.lower()))
+
+def exact_key(text):
+    # the key Deduper matches exact duplicates on; None for failed parses
+    norm = _normalize(text)
+    return text_hash(norm) if norm else None
+
+class Deduper:
+    # Drops resubmitted resumes before profiling and embedding.
+    # Exact duplicates share a hash of the normalized text (case, punctuation
+    # and whitespace ignored, so the same CV as PDF and DOCX still matches).
+    # Near duplicates are found with MinHash over word shingles: LSH bands
+    # bucket signatures, and a bucket hit counts if the estimated Jaccard
+    # similarity reaches `threshold`. The first resume seen in a cluster is kept.
+    # State carries across calls, so the CLI can dedup batch by batch.
+    def __init__(self, threshold=0.85, num_perm=128, bands=16, shingle=5, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        # multiply-shift hashing; uint64 products wrap, which is the point
+        self._mix = rng.integers(1, 2**63, shingle, dtype=np.uint64) | np.uint64(1)
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self._exact = {}
+        self._buckets = {}
+        self._sigs = {}
+        self.pairs = []
+
+    def signature(self, words):
+        if not words:
+            return None
+        w = np.fromiter((zlib.crc32(t.encode()) for t in words), dtype=np.uint64, count=len(words))
+        k = min(self.shingle, len(w))
+        n = len(w) - k + 1
+        # shingle hash: word hashes at offsets 0..k-1 mixed with per-offset odd constants
+        sh = w[:n] * self._mix[0]
+        for j in range(1, k):
+            sh += w[j:j+n] * self._mix[j]
+        sh = np.unique(sh)
+        return ((np.outer(sh, self._a) + self._b) >> np.uint64(32)).min(axis=0)
+
+    def _bands(self, sig):
+        r = len(sig) // self.bands
+        return [(i, sig[i*r:(i+1)*r].tobytes()) for i in range(self.bands)]
+
+    def _near(self, sig):
+        best, best_sim = None, 0.0
+        seen = set()
+        for band in self._bands(sig):
+            for name in self._buckets.get(band, ()):
+                if name in seen:
+                    continue
+                seen.add(name)
+                sim = float(np.mean(self._sigs[name] == sig))
+                if sim >= self.threshold and sim > best_sim:
+                    best, best_sim = name, sim
+        return best, best_sim
+
+    def filter(self, texts):
+        # texts: {candidate_id: text}; returns the subset to keep, in order
+        with span("stage.dedup"):
+            return self._filter(texts)
+
+    def _filter(self, texts):
+        kept = {}
+        for name, text in texts.items():
+            norm = _normalize(text)
+            if not norm:
+                # failed parses are not duplicates of each other
+                kept[name] = text
+                continue
+            h = text_hash(norm)
+            first = self._exact.get(h)
+            if first is not None:
+                self.pairs.append((first, name, "exact", 1.0))
+                continue
+            sig = self.signature(norm.split())
+            match, sim = self._near(sig)
+            if match is not None:
+                self.pairs.append((match, name, "near", round(sim, 3)))
+                continue
+            self._exact[h] = name
+            self._sigs[name] = sig
+            for band in self._bands(sig):
+                self._buckets.setdefault(band, []).append(name)
+            kept[name] = text
+        return kept
+
+    def clusters(self):
+        out = {}
+        for kept, dup, _, _ in self.pairs:
+            out.setdefault(kept, []).append(dup)
+        return out
+
+    def report(self):
+        import pandas as pd
+        return pd.DataFrame(self.pairs, columns=["kept", "duplicate", "match", "similarity"])
+
+def dedup_texts(texts, threshold=0.85):
+    d = Deduper(threshold=threshold)
+    return d.filter(texts), d.report()
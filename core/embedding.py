@@ -1,22 +1,232 @@
+import os, threading, time
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from core.cache import text_hash
+from core.profiling import span, count
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Process-wide model registry: each model is loaded once and shared by every
+# Embedder, Streamlit session and thread in the process.
+_MODELS = {}
+_MODEL_LOCKS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def _model_lock(model_name):
+    with _REGISTRY_LOCK:
+        return _MODEL_LOCKS.setdefault(model_name, threading.Lock())
+
+def load_model(model_name=DEFAULT_MODEL):
+    if model_name in _MODELS:
+        return _MODELS[model_name]
+    with _model_lock(model_name):
+        if model_name not in _MODELS:
+            try:
+                from sentence_transformers import SentenceTransformer
+                _MODELS[model_name] = SentenceTransformer(model_name)
+            except Exception:
+                # remember the failure so the fallback does not retry the import every call
+                _MODELS[model_name] = None
+    return _MODELS[model_name]
+
+def warmup(model_names=(DEFAULT_MODEL,)):
+    return {name: load_model(name) is not None for name in model_names}
+
+def loaded_models():
+    return [name for name, m in _MODELS.items() if m is not None]
+
+class HashingTfidf:
+    # TF-IDF fallback with a fixed hashed vocabulary, so vectors from different
+    # runs live in the same space, and document frequencies that grow
+    # incrementally and persist between runs. Each distinct text is counted once
+    # (by content hash). Output stays scipy.sparse, l2-normalized.
+    def __init__(self, path=None, n_features=2**18):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.path = path
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1,2), alternate_sign=False, norm=None)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.seen = set()
+        if path and os.path.exists(path):
+            with np.load(path) as z:
+                if int(z["n_features"]) == n_features:
+                    self.doc_freq = z["doc_freq"].astype(np.int64)
+                    self.n_docs = int(z["n_docs"])
+                    self.seen = set(z["seen"].tolist())
+
+    def _key(self, text):
+        return int(text_hash(text)[:16], 16)
+
+    def partial_fit(self, texts):
+        terms, counts, keys = self.doc_counts(texts)
+        if not keys:
+            return False
+        self.merge(terms, counts, keys)
+        return True
+
+    def doc_counts(self, texts):
+        # what partial_fit would add, without adding it: (term ids, document
+        # counts, keys of the unseen texts); shards send these to be merged
+        new, keys = [], {}
+        for t in texts:
+            k = self._key(t)
+            if k not in self.seen and k not in keys:
+                keys[k] = None
+                new.append(t)
+        if not new:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), []
+        df = np.bincount(self.vectorizer.transform(new).indices, minlength=len(self.doc_freq))
+        terms = np.flatnonzero(df)
+        return terms, df[terms], list(keys)
+
+    def merge(self, terms, counts, keys):
+        np.add.at(self.doc_freq, terms, counts)
+        self.n_docs += len(keys)
+        self.seen.update(keys)
+
+    def idf(self):
+        # same smoothing as sklearn's TfidfVectorizer
+        return np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1.0
+
+    def transform(self, texts):
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+        X = self.vectorizer.transform(texts)
+        X = X @ sparse.diags(self.idf().astype(np.float32))
+        return normalize(X.astype(np.float32).tocsr())
+
+    def save(self):
+        if not self.path:
+            return
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        # a temp file per writer, so concurrent sessions never replace each other's half-written file
+        import tempfile
+        fd, tmp = tempfile.mkstemp(dir=d or ".", prefix=os.path.basename(self.path) + ".", suffix=".tmp.npz")
+        os.close(fd)
+        try:
+            np.savez(tmp, doc_freq=self.doc_freq, n_docs=self.n_docs, n_features=len(self.doc_freq),
+                     seen=np.fromiter(self.seen, dtype=np.uint64, count=len(self.seen)))
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+def chunk_text(text, chunk_words=160, overlap=32):
+    words = text.split()
+    if len(words) <= chunk_words:
+        return [" ".join(words)]
+    step = max(1, chunk_words - overlap)
+    return [" ".join(words[i:i+chunk_words]) for i in range(0, len(words) - overlap, step)]
+
+def pool_chunks(vecs, owner, pooling="mean", query=None):
+    # owner[i] is the document of chunk i; chunks of a document are contiguous
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    if pooling == "mean":
+        out = np.add.reduceat(vecs, starts, axis=0)
+    elif pooling == "max":
+        out = np.maximum.reduceat(vecs, starts, axis=0)
+    elif pooling == "best":
+        if query is None:
+            raise ValueError("pooling='best' needs a query")
+        scores = vecs @ np.asarray(query, dtype=np.float32).ravel()
+        best = [s + int(np.argmax(scores[s:e])) for s, e in zip(starts, np.r_[starts[1:], len(owner)])]
+        out = vecs[best]
+    else:
+        raise ValueError(f"unknown pooling: {pooling}")
+    n = np.linalg.norm(out, axis=1, keepdims=True)
+    n[n == 0] = 1
+    return out / n
+
 class Embedder:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        self.model = None
+    def __init__(self, model_name=DEFAULT_MODEL, cache=None, tfidf_path=None):
         self.tfidf = None
+        self.tfidf_path = tfidf_path
         self.model_name = model_name
-        try:
-            from sentence_transformers import SentenceTransformer
-            self.model = SentenceTransformer(model_name)
-        except Exception:
-            self.model = None
-    def encode(self, texts):
+        self.cache = cache
+        self.model = load_model(model_name)
+        self._lock = _model_lock(model_name)
+        self.last_stats = None
+    def _model_encode(self, texts, batch_size=32):
+        with self._lock:
+            return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True)
+    def encode(self, texts, batch_size=32, fit=True):
+        # fit=False (queries such as JDs): the TF-IDF fallback only transforms,
+        # so the texts do not count as corpus documents and nothing is written
+        texts = list(texts)
+        count("embed.texts", len(texts))
         if self.model:
-            return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
-        if self.tfidf is None:
-            self.tfidf = TfidfVectorizer(max_features=5000, ngram_range=(1,2))
-            self.tfidf.fit(texts)
-        return self.tfidf.transform(texts).toarray()
+            with span("embed.model"):
+                if self.cache is not None:
+                    return self._encode_cached(texts, batch_size)
+                return self._model_encode(texts, batch_size)
+        with span("embed.tfidf"):
+            if self.tfidf is None:
+                self.tfidf = HashingTfidf(self.tfidf_path)
+            if fit and self.tfidf.partial_fit(texts):
+                self.tfidf.save()
+            return self.tfidf.transform(texts)
+    def encode_query(self, texts, batch_size=32):
+        return self.encode(texts, batch_size, fit=False)
+    def _encode_cached(self, texts, batch_size=32):
+        # Only texts whose (model, content hash) is not cached go through the model
+        keys = [text_hash(t) for t in texts]
+        found = self.cache.get_many(self.model_name, list(set(keys)))
+        todo = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in todo:
+                todo[k] = t
+        if todo:
+            new = self._model_encode(list(todo.values()), batch_size)
+            new = np.asarray(new, dtype=np.float32)
+            found.update(zip(todo.keys(), new))
+            self.cache.put_many(self.model_name, zip(todo.keys(), new))
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+        return np.vstack([found[k] for k in keys])
+    def _token_counts(self, texts):
+        tok = getattr(self.model, "tokenizer", None)
+        if tok is None:
+            return [len(t.split()) for t in texts]
+        return [len(ids) for ids in tok(texts, add_special_tokens=False)["input_ids"]]
+    def encode_chunked(self, texts, pooling="mean", query=None, chunk_words=160, overlap=32, batch_size=64):
+        # Long-document mode: the model truncates at max_seq_length (256 for
+        # MiniLM), so every resume is split into overlapping word windows, all
+        # chunks of all resumes are encoded in length-sorted batches (little
+        # padding per batch) and the chunk vectors are pooled per resume:
+        # "mean", "max", or "best" (the chunk closest to `query`).
+        texts = list(texts)
+        if not self.model:
+            return self.encode(texts)
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+        chunks, owner = [], []
+        for i, t in enumerate(texts):
+            parts = chunk_text(t, chunk_words, overlap)
+            chunks.extend(parts)
+            owner.extend([i] * len(parts))
+        owner = np.array(owner, dtype=np.int64)
+
+        t0 = time.perf_counter()
+        lengths = np.array(self._token_counts(chunks))
+        order = np.argsort(-lengths, kind="stable")
+        vecs = None
+        for b in range(0, len(order), batch_size):
+            rows = order[b:b+batch_size]
+            out = np.asarray(self.encode([chunks[r] for r in rows], batch_size=len(rows)), dtype=np.float32)
+            if vecs is None:
+                vecs = np.zeros((len(chunks), out.shape[1]), dtype=np.float32)
+            vecs[rows] = out
+        secs = time.perf_counter() - t0
+        self.last_stats = {
+            "documents": len(texts), "chunks": len(chunks), "tokens": int(lengths.sum()),
+            "seconds": round(secs, 4), "tokens_per_s": round(float(lengths.sum()) / secs, 1) if secs else None,
+        }
+        count("embed.chunks", len(chunks))
+        count("embed.tokens", int(lengths.sum()))
+        return pool_chunks(vecs, owner, pooling, query=None if query is None else self.encode_query([query])[0])
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else None
     def similarity(self, a, b):
-        return cosine_similarity(a, b)
\ No newline at end of file
+        from sklearn.metrics.pairwise import cosine_similarity
+        return cosine_similarity(a, b)
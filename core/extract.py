@@ -1,14 +1,23 @@
-import re, numpy as np, pandas as pd
+import re, unicodedata
+from datetime import datetime
+
+# All patterns are compiled once at import; extract_profile lowercases the
+# cleaned text once and hands the same buffer to every field extractor.
+_WS = re.compile(r"\s+")
+
 def clean_text(t):
-    t = re.sub(r"\s+", " ", t)
+    t = _WS.sub(" ", t)
     return t.strip()
-from datetime import datetime
 
 MONTHS = {
     "jan":1,"january":1,"feb":2,"february":2,"mar":3,"march":3,"apr":4,"april":4,"may":5,"jun":6,"june":6,
     "jul":7,"july":7,"aug":8,"august":8,"sep":9,"sept":9,"september":9,"oct":10,"october":10,"nov":11,"november":11,"dec":12,"december":12
 }
 
+_MONTH_YEAR = re.compile(r"([a-z]{3,9})\s+(\d{4})")
+_DAY_MONTH_YEAR = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_NUM_MONTH_YEAR = re.compile(r"(\d{1,2})/(\d{4})")
+
 def _parse_to_month_year(token):
     token = token.lower().strip()
 
@@ -18,35 +27,34 @@ def _parse_to_month_year(token):
         return today.year, today.month
 
     # Jun 2024 or August 2023
-    m = re.match(r"([a-z]{3,9})\s+(\d{4})", token)
+    m = _MONTH_YEAR.match(token)
     if m:
         month = MONTHS.get(m.group(1), 1)
         year = int(m.group(2))
         return year, month
 
     # 01/06/2025 or 06/2024
-    m = re.match(r"(\d{1,2})/(\d{1,2})/(\d{4})", token)
+    m = _DAY_MONTH_YEAR.match(token)
     if m:
         return int(m.group(3)), int(m.group(2))
 
     # 06/2024
-    m = re.match(r"(\d{1,2})/(\d{4})", token)
+    m = _NUM_MONTH_YEAR.match(token)
     if m:
         return int(m.group(2)), int(m.group(1))
 
     return None, None
 
 
+_DATE_TOKEN = r"([A-Za-z]{3,9}\s+\d{4}|\d{1,2}/\d{4}|\d{1,2}/\d{1,2}/\d{4}|present|current|now)"
+_DATE_RANGE = re.compile(_DATE_TOKEN + r"\s*(?:-|to|–|—|\s)\s*" + _DATE_TOKEN, flags=re.I)
+_MONTHS_MENTION = re.compile(r"(\d+)\s+months?")
+
 def extract_years_of_experience(text):
-    text = text.lower()
+    return _years_of_experience(text.lower())
 
-    ranges = re.findall(
-        r"([A-Za-z]{3,9}\s+\d{4}|\d{1,2}/\d{4}|\d{1,2}/\d{1,2}/\d{4}|present|current|now)"
-        r"\s*(?:-|to|–|—|\s)\s*"
-        r"([A-Za-z]{3,9}\s+\d{4}|\d{1,2}/\d{4}|\d{1,2}/\d{1,2}/\d{4}|present|current|now)",
-        text,
-        flags=re.I
-    )
+def _years_of_experience(text):
+    ranges = _DATE_RANGE.findall(text)
 
     total_months = 0
     seen = set()
@@ -65,7 +73,7 @@ def extract_years_of_experience(text):
 
     # fallback: explicit "x months"
     if total_months == 0:
-        m2 = re.findall(r"(\d+)\s+months?", text)
+        m2 = _MONTHS_MENTION.findall(text)
         for m in m2:
             total_months += int(m)
 
@@ -77,126 +85,139 @@ def extract_years_of_experience(text):
 
 
 
+BACHELOR_PATTERNS = [
+    r"b\.?\s*tech",
+    r"b\s*tech",
+    r"b\.?\s*e",
+    r"bachelor",
+    r"undergraduate",
+    r"ug program",
+    r"graduation"
+]
+
+MASTER_PATTERNS = [
+    r"m\.?\s*tech",
+    r"m\s*tech",
+    r"m\.?\s*sc",
+    r"master",
+    r"post\s*graduate",
+    r"pg program"
+]
+
+# One alternation per level: any pattern matching anywhere is the same as the
+# first match of a per-pattern loop.
+_BACHELOR = re.compile("|".join(BACHELOR_PATTERNS))
+_MASTER = re.compile("|".join(MASTER_PATTERNS))
+
 def extract_education_level(t):
-    t = t.lower()
-    bachelor_patterns = [
-        r"b\.?\s*tech",
-        r"b\s*tech",
-        r"b\.?\s*e",
-        r"bachelor",
-        r"undergraduate",
-        r"ug program",
-        r"graduation"
-    ]
-
-    master_patterns = [
-        r"m\.?\s*tech",
-        r"m\s*tech",
-        r"m\.?\s*sc",
-        r"master",
-        r"post\s*graduate",
-        r"pg program"
-    ]
-
-    for p in bachelor_patterns:
-        if re.search(p, t):
-            return "Bachelors"
-
-    for p in master_patterns:
-        if re.search(p, t):
-            return "Masters"
+    return _education_level(t.lower())
 
-    return "Other"
+def _education_level(t):
+    if _BACHELOR.search(t):
+        return "Bachelors"
 
+    if _MASTER.search(t):
+        return "Masters"
 
+    return "Other"
 
-def extract_cgpa(t):
-    t = t.lower()
 
-    # Case: "7.43 CGPA"
-    m = re.search(r"(\d\.\d{1,2})\s*cgpa", t)
-    if m:
-        try:
-            cg = float(m.group(1))
-            if 0.0 < cg <= 10.0:
-                return round(cg, 2)
-        except:
-            pass
 
-    # Case: "CGPA: 7.43" or "CGPA - 7.43" or "CGPA 7.43"
-    m = re.search(r"cgpa\s*[:=\- ]\s*(\d\.\d{1,2})", t)
-    if m:
-        try:
-            cg = float(m.group(1))
-            if 0.0 < cg <= 10.0:
-                return round(cg, 2)
-        except:
-            pass
+_CGPA_PATTERNS = [
+    re.compile(r"(\d\.\d{1,2})\s*cgpa"),               # "7.43 CGPA"
+    re.compile(r"cgpa\s*[:=\- ]\s*(\d\.\d{1,2})"),     # "CGPA: 7.43", "CGPA - 7.43", "CGPA 7.43"
+    re.compile(r"gpa\s*[:=\- ]\s*(\d\.\d{1,2})"),      # "GPA 8.15"
+    re.compile(r"(\d\.\d{1,2})\s*/\s*10"),             # "7.43/10"
+]
 
-    # Case: GPA 8.15
-    m = re.search(r"gpa\s*[:=\- ]\s*(\d\.\d{1,2})", t)
-    if m:
-        try:
-            cg = float(m.group(1))
-            if 0.0 < cg <= 10.0:
-                return round(cg, 2)
-        except:
-            pass
+def extract_cgpa(t):
+    return _cgpa(t.lower())
 
-    # Case: "7.43/10"
-    m = re.search(r"(\d\.\d{1,2})\s*/\s*10", t)
-    if m:
-        try:
+def _cgpa(t):
+    # patterns are tried in order; only the first hit of each is considered
+    for p in _CGPA_PATTERNS:
+        m = p.search(t)
+        if m:
             cg = float(m.group(1))
             if 0.0 < cg <= 10.0:
                 return round(cg, 2)
-        except:
-            pass
 
     return None
 
+_NON_ASCII = re.compile(r"[^\x00-\x7F]")
+_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_EMAIL_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+_NON_EMAIL_CHARS = re.compile(r"[^A-Za-z0-9@._+-]")
+_DIGIT_RUN = re.compile(r"\d+")
+_PHONE = re.compile(r"[6789]\d{9}")
+
+def _find_email(t):
+    # An email needs an "@", and no match can start before the local-part run
+    # that ends at the first "@", so the search starts there instead of at 0.
+    k = t.find("@")
+    if k < 0:
+        return None
+    while k > 0 and t[k - 1] in _EMAIL_LOCAL_CHARS:
+        k -= 1
+    return _EMAIL.search(t, k)
+
+def _find_phone(text):
+    # first 10-digit run starting with 6-9 in the digit stream; stops reading
+    # digits as soon as a complete window matches
+    digits = ""
+    for run in _DIGIT_RUN.finditer(text):
+        start = max(0, len(digits) - 9)
+        digits += run.group(0)
+        m = _PHONE.search(digits, start)
+        if m:
+            return m.group(0)
+    return ""
+
 def extract_contacts(text):
-    import unicodedata
+    return _contacts(text)
 
-    # Normalize text
-    t = unicodedata.normalize("NFKC", text)
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[^\x00-\x7F]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
+def _contacts(text, clean=False):
+    # Normalize text (NFKC and the ASCII filter are no-ops on ASCII input, and
+    # clean_text output is already whitespace-collapsed)
+    if text.isascii():
+        t = text if clean else _WS.sub(" ", text).strip()
+    else:
+        t = unicodedata.normalize("NFKC", text)
+        t = t.replace("\u00A0", " ")
+        t = _NON_ASCII.sub(" ", t)
+        t = _WS.sub(" ", t).strip()
 
     # ---- EMAIL SUPER-ROBUST MODE ----
     # Step 1: Try normal match (works for clean resumes)
-    m = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", t)
+    m = _find_email(t)
     if m:
         email = m.group(0)
     else:
         # Step 2: Reconstruct email from scattered characters
-        compressed = re.sub(r"\s+", "", text)            # remove spaces
-        compressed = re.sub(r"[^A-Za-z0-9@._+-]", "", compressed)  # keep only email characters
-        m2 = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", compressed)
+        # (drops whitespace and everything else that cannot appear in an email)
+        m2 = _find_email(_NON_EMAIL_CHARS.sub("", text)) if "@" in text else None
         email = m2.group(0) if m2 else ""
 
     # ---- PHONE SUPER-ROBUST MODE ----
-    digits = re.sub(r"\D", "", text)
-    candidates = []
-    for i in range(len(digits) - 9):
-        chunk = digits[i:i+10]
-        if chunk[0] in "6789":
-            candidates.append(chunk)
-    phone = candidates[0] if candidates else ""
+    phone = _find_phone(text)
 
     return email, phone
 
 
 
+# the lookahead rejects positions that cannot start any keyword before the
+# alternation is tried
+_RECENT_WORK = re.compile(
+    r"(?=[iepwrdma])(intern|internship|experience|project|work|employed|role|position|data|ml|ai|analyst)[\s\S]{0,40}?(20\d{2})",
+    flags=re.I
+)
+_YEAR = re.compile(r"20\d{2}")
+
 def recency_score(text):
-    text = text.lower()
+    return _recency(text.lower())
 
-    matches = re.findall(
-        r"(intern|internship|experience|project|work|employed|role|position|data|ml|ai|analyst)[\s\S]{0,40}?(20\d{2})",
-        text,
-        flags=re.I
-    )
+def _recency(text):
+    matches = _RECENT_WORK.findall(text)
 
     # Case 1: Found relevant work/project years
     if matches:
@@ -205,7 +226,7 @@ def recency_score(text):
 
     else:
         # Case 2: look for any years but ignore schooling (2018 and before)
-        years = [int(y) for y in re.findall(r"20\d{2}", text) if int(y) > 2018]
+        years = [int(y) for y in _YEAR.findall(text) if int(y) > 2018]
 
         if not years:
             return 0.6  # soft neutral default
@@ -216,7 +237,7 @@ def recency_score(text):
 
     # Convert recency gap into score
     if gap <= 0:
-        return 1.0      
+        return 1.0
     elif gap == 1:
         return 0.9
     elif gap == 2:
@@ -224,31 +245,33 @@ def recency_score(text):
     elif gap <= 4:
         return 0.6
     return 0.45
-from core.skill_extractor import build_skill_index, extract_skills_whitelist
-def extract_profile(t, skills):
-    t = clean_text(t)
-    yrs,months = extract_years_of_experience(t)
-    edu = extract_education_level(t)
-    email, phone = extract_contacts(t)
-    skill_idx = build_skill_index(skills, synonyms={
-        "power bi":["powerbi","ms power bi"],
-        "scikit-learn":["sklearn","scikit learn"],
-        "pytorch":["py torch"],
-        "mysql":["my sql"],
-        "postgresql":["postgre sql","postgres"],
-        "computer vision":["cv"],
-        "nlp":["natural language processing"],
-        "llm":["large language model","large language models"],
-        "tensorflow":["tf"],
-        "aws":["amazon web services"],
-        "gcp":["google cloud","google cloud platform"],
-        "docker":["containers","containerization"],
-        "rest api":["restful api","rest apis"],
-        "fastapi":["fast api"],
-        "opencv":["open cv"]
-    })
-    skills_found = extract_skills_whitelist(t, skill_idx, n_max=4, fuzzy=False)
-    rec = recency_score(t)
+from core.skill_extractor import as_skill_index, extract_skills_whitelist
+from core.utils import MAX_TEXT_CHARS
+from core.profiling import span, count, active
+def extract_profile(t, skills, max_chars=MAX_TEXT_CHARS, fuzzy=True):
+    # same cap as the file readers, so pasted or pre-extracted text is bounded too
+    with span("extract.clean"):
+        t = clean_text(t if max_chars is None else t[:max_chars])
+        low = t.lower()
+    with span("extract.experience"):
+        yrs,months = _years_of_experience(low)
+    with span("extract.education"):
+        edu = _education_level(low)
+    with span("extract.contacts"):
+        email, phone = _contacts(t, clean=True)
+    with span("extract.skills"):
+        skill_idx = as_skill_index(skills)
+        # fuzzy lookups go through the skill index's trigram postings, cheap enough to leave on
+        skills_found = extract_skills_whitelist(low, skill_idx, n_max=4, fuzzy=fuzzy)
+    with span("extract.recency"):
+        rec = _recency(low)
+    with span("extract.cgpa"):
+        cgpa = _cgpa(low)
+    import pandas as pd
+    if active():
+        count("extract.docs")
+        count("extract.tokens", low.count(" ") + 1 if low else 0)
+        count("extract.skills_found", len(skills_found))
     return pd.Series({
         "clean_text": t,
         "years_experience": yrs,
@@ -258,6 +281,6 @@ def extract_profile(t, skills):
         "phone": phone,
         "skills_found": skills_found,
         "recency": rec,
-        "cgpa": extract_cgpa(t),
+        "cgpa": cgpa,
         "total_skills_found": len(skills_found)
     })
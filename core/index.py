@@ -0,0 +1,208 @@
+import json
+import numpy as np
+
+def _l2(a):
+    if hasattr(a, "tocsr"):
+        # the TF-IDF fallback's vectors are scipy.sparse with a hashed, growing vocabulary
+        raise TypeError("vector indexes need dense model embeddings, got a sparse matrix")
+    a = np.asarray(a, dtype=np.float32)
+    if a.ndim == 1:
+        a = a.reshape(1, -1)
+    n = np.linalg.norm(a, axis=1, keepdims=True)
+    n[n == 0] = 1
+    return a / n
+
+def _top(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+class FlatIndex:
+    # Exact cosine top-k over L2-normalized vectors with brute-force NumPy.
+    # Rows are append-only; removals only clear the `alive` flag until compact().
+    kind = "flat"
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids = []
+        self.row_of = {}
+        self.n = 0
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def __contains__(self, cid):
+        return cid in self.row_of
+
+    def _grow(self, extra):
+        need = self.n + extra
+        if need > len(self.vectors):
+            cap = max(need, 2 * len(self.vectors), 1024)
+            v = np.zeros((cap, self.dim), dtype=np.float32)
+            v[:self.n] = self.vectors[:self.n]
+            a = np.zeros(cap, dtype=bool)
+            a[:self.n] = self.alive[:self.n]
+            self.vectors, self.alive = v, a
+
+    def add(self, ids, vectors):
+        ids = list(ids)
+        vectors = _l2(vectors)
+        self.remove([i for i in ids if i in self.row_of])
+        self._grow(len(ids))
+        rows = np.arange(self.n, self.n + len(ids))
+        self.vectors[rows] = vectors
+        self.alive[rows] = True
+        for cid, r in zip(ids, rows):
+            self.row_of[cid] = int(r)
+        self.ids.extend(ids)
+        self.n += len(ids)
+        self._added(rows, vectors)
+        return rows
+
+    def _added(self, rows, vectors):
+        pass
+
+    def remove(self, ids):
+        for cid in ids:
+            r = self.row_of.pop(cid, None)
+            if r is not None:
+                self.alive[r] = False
+
+    def search(self, query, k=10):
+        q = _l2(query).ravel()
+        scores = self.vectors[:self.n] @ q
+        scores[~self.alive[:self.n]] = -np.inf
+        rows = _top(scores, min(k, len(self)))
+        return [self.ids[r] for r in rows], scores[rows]
+
+    def live(self):
+        rows = np.flatnonzero(self.alive[:self.n])
+        return [self.ids[r] for r in rows], self.vectors[rows]
+
+    def compact(self):
+        ids, vecs = self.live()
+        fresh = self.__class__(**self._params())
+        fresh.add(ids, vecs)
+        self.__dict__.update(fresh.__dict__)
+
+    def _params(self):
+        return {"dim": self.dim}
+
+    def _state(self):
+        return {}
+
+    def save(self, path):
+        ids, vecs = self.live()
+        meta = {"kind": self.kind, "params": self._params()}
+        np.savez(path, vectors=vecs, ids=np.array(ids, dtype=str), meta=np.array(json.dumps(meta)), **self._state())
+
+class IVFIndex(FlatIndex):
+    # Inverted-file index: spherical k-means centroids partition the vectors;
+    # a query scans only the n_probe lists whose centroids are closest.
+    # Until train() has run (or min_train vectors are present) search is exact.
+    kind = "ivf"
+
+    def __init__(self, dim, n_lists=None, n_probe=8, min_train=4096):
+        super().__init__(dim)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train = min_train
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.lists = {}
+        self._arrays = {}
+
+    def _params(self):
+        return {"dim": self.dim, "n_lists": self.n_lists, "n_probe": self.n_probe, "min_train": self.min_train}
+
+    def _state(self):
+        return {} if self.centroids is None else {"centroids": self.centroids}
+
+    def train(self, vectors=None, n_iter=10, sample=50_000, seed=0):
+        if vectors is None:
+            _, vectors = self.live()
+        vectors = _l2(vectors)
+        rng = np.random.default_rng(seed)
+        if len(vectors) > sample:
+            vectors = vectors[rng.choice(len(vectors), sample, replace=False)]
+        k = self.n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+        k = min(k, len(vectors))
+        C = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+        for _ in range(n_iter):
+            lab = self._nearest(vectors, C)
+            for c in range(k):
+                members = vectors[lab == c]
+                if len(members):
+                    C[c] = members.sum(axis=0)
+            C = _l2(C)
+        self.centroids = C
+        self.n_lists = k
+        # re-bucket everything already stored
+        self.lists, self._arrays = {}, {}
+        self.assign = np.zeros(len(self.vectors), dtype=np.int32)
+        rows = np.flatnonzero(self.alive[:self.n])
+        if len(rows):
+            self._bucket(rows, self.vectors[rows])
+
+    @staticmethod
+    def _nearest(vectors, C, chunk=65536):
+        out = np.empty(len(vectors), dtype=np.int32)
+        for i in range(0, len(vectors), chunk):
+            out[i:i+chunk] = np.argmax(vectors[i:i+chunk] @ C.T, axis=1)
+        return out
+
+    def _bucket(self, rows, vectors):
+        if len(self.assign) < len(self.vectors):
+            a = np.zeros(len(self.vectors), dtype=np.int32)
+            a[:len(self.assign)] = self.assign
+            self.assign = a
+        lab = self._nearest(vectors, self.centroids)
+        self.assign[rows] = lab
+        for r, c in zip(rows, lab):
+            self.lists.setdefault(int(c), []).append(int(r))
+            self._arrays.pop(int(c), None)
+
+    def _added(self, rows, vectors):
+        if self.centroids is None:
+            if len(self) >= self.min_train:
+                self.train()
+            return
+        self._bucket(rows, vectors)
+
+    def compact(self):
+        ids, vecs = self.live()
+        fresh = IVFIndex(**self._params())
+        fresh.centroids = self.centroids
+        fresh.add(ids, vecs)
+        self.__dict__.update(fresh.__dict__)
+
+    def _rows(self, c):
+        arr = self._arrays.get(c)
+        if arr is None:
+            arr = self._arrays[c] = np.array(self.lists.get(c, []), dtype=np.int64)
+        return arr
+
+    def search(self, query, k=10, n_probe=None):
+        if self.centroids is None:
+            return super().search(query, k)
+        q = _l2(query).ravel()
+        probe = _top(self.centroids @ q, n_probe or self.n_probe)
+        rows = np.concatenate([self._rows(int(c)) for c in probe]) if len(probe) else np.zeros(0, dtype=np.int64)
+        rows = rows[self.alive[rows]]
+        scores = self.vectors[rows] @ q
+        top = _top(scores, k)
+        return [self.ids[r] for r in rows[top]], scores[top]
+
+def load_index(path):
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"]))
+        idx = IVFIndex(**meta["params"]) if meta["kind"] == "ivf" else FlatIndex(**meta["params"])
+        if "centroids" in z.files:
+            idx.centroids = z["centroids"]
+            idx.n_lists = len(idx.centroids)
+        idx.add(z["ids"].tolist(), z["vectors"])
+    return idx
@@ -0,0 +1,52 @@
+from multiprocessing import get_context
+import numpy as np
+from core.extract import extract_profile
+from core.ranking import CandidatePool
+from core.profiling import span
+
+def _profiles(texts, skills):
+    return [extract_profile(t, skills) for t in texts]
+
+def profile_frame(texts, skills, workers=None):
+    # with workers the per-extractor spans run in child processes and are not recorded
+    with span("stage.profile"):
+        return _profile_frame(texts, skills, workers)
+
+def _profile_frame(texts, skills, workers):
+    import pandas as pd
+    df = pd.DataFrame([{"candidate_id":k,"raw_text":v} for k,v in texts.items()])
+    if df.empty:
+        return df
+    if not workers or workers <= 1:
+        df_prof = df.apply(lambda r: extract_profile(r["raw_text"], skills), axis=1, result_type="expand")
+    else:
+        raw = df["raw_text"].tolist()
+        step = max(1, len(raw) // (workers * 4))
+        # spawn, not fork: callers may already run threads (the app's model warm-up)
+        with get_context("spawn").Pool(processes=workers) as pool:
+            parts = pool.starmap(_profiles, [(raw[i:i+step], skills) for i in range(0, len(raw), step)])
+        df_prof = pd.DataFrame([p for part in parts for p in part])
+    return pd.concat([df, df_prof], axis=1)
+
+def encode_texts(embedder, texts, pooling=None, batch_size=64):
+    # pooling=None embeds each text whole (truncated by the model); "mean" or
+    # "max" embeds the full text chunk by chunk and pools the chunk vectors
+    with span("stage.embed"):
+        if pooling:
+            return embedder.encode_chunked(texts, pooling=pooling, batch_size=batch_size)
+        return embedder.encode(texts)
+
+def prepare_candidates(texts, skills, embedder, pooling=None, batch_size=64, rarity=None):
+    # Per-candidate stage: text -> profile -> embedding + skill vector.
+    # Cache the result and re-rank it with core.ranking.rank_pool.
+    df = profile_frame(texts, skills)
+    emb = encode_texts(embedder, df["clean_text"].tolist(), pooling, batch_size)
+    with span("stage.pool"):
+        return CandidatePool(df, emb, rarity=rarity)
+
+def stack_embeddings(parts):
+    # batches from the TF-IDF fallback are sparse, model batches dense
+    from scipy import sparse
+    if any(sparse.issparse(p) for p in parts):
+        return sparse.vstack(parts, format="csr")
+    return np.vstack(parts)
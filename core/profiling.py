@@ -0,0 +1,113 @@
+import cProfile, io, json, pstats, time
+from contextvars import ContextVar
+
+# Spans and counters are recorded only inside profile_run(); elsewhere span()
+# returns a shared no-op and count() returns immediately. The active profiler
+# lives in a ContextVar, so concurrent Streamlit sessions (one thread each)
+# don't mix their numbers. Work done in multiprocessing workers is not
+# recorded; only the enclosing stage span in the parent is.
+_ACTIVE = ContextVar("profiler", default=None)
+
+class _Span:
+    __slots__ = ("prof", "name", "t0")
+
+    def __init__(self, prof, name):
+        self.prof, self.name = prof, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.add_time(self.name, time.perf_counter() - self.t0)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+class Profiler:
+    def __init__(self, cprofile=False, top=30):
+        self.spans = {}
+        self.counters = {}
+        self.top = top
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self.wall = 0.0
+
+    def add_time(self, name, dt):
+        s = self.spans.get(name)
+        if s is None:
+            s = self.spans[name] = [0, 0.0, 0.0]
+        s[0] += 1
+        s[1] += dt
+        if dt > s[2]:
+            s[2] = dt
+
+    def add_count(self, name, n):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def _cprofile_rows(self):
+        st = pstats.Stats(self.cprofile, stream=io.StringIO()).sort_stats("cumulative")
+        rows = []
+        for (fn, line, func), (cc, nc, tt, ct, _) in st.stats.items():
+            rows.append({"function": f"{func} ({fn}:{line})", "calls": nc,
+                         "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)})
+        rows.sort(key=lambda r: -r["cumtime_s"])
+        return rows[:self.top]
+
+    def to_dict(self):
+        out = {
+            "wall_s": round(self.wall, 4),
+            "spans": {k: {"count": c, "total_s": round(t, 4), "mean_ms": round(t / c * 1e3, 3),
+                          "max_ms": round(m * 1e3, 3)}
+                      for k, (c, t, m) in sorted(self.spans.items(), key=lambda kv: -kv[1][1])},
+            "counters": dict(sorted(self.counters.items())),
+        }
+        if self.cprofile is not None:
+            out["cprofile"] = self._cprofile_rows()
+        return out
+
+    def to_json(self, path=None):
+        text = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(text)
+        return text
+
+class profile_run:
+    # with profile_run(cprofile=True) as prof: ...; prof.to_dict()
+    def __init__(self, cprofile=False, top=30):
+        self.prof = Profiler(cprofile, top)
+
+    def __enter__(self):
+        self._token = _ACTIVE.set(self.prof)
+        self._t0 = time.perf_counter()
+        if self.prof.cprofile is not None:
+            self.prof.cprofile.enable()
+        return self.prof
+
+    def __exit__(self, *exc):
+        if self.prof.cprofile is not None:
+            self.prof.cprofile.disable()
+        self.prof.wall += time.perf_counter() - self._t0
+        _ACTIVE.reset(self._token)
+        return False
+
+def active():
+    return _ACTIVE.get()
+
+def span(name):
+    prof = _ACTIVE.get()
+    return _NO_SPAN if prof is None else _Span(prof, name)
+
+def count(name, n=1):
+    prof = _ACTIVE.get()
+    if prof is not None:
+        prof.add_count(name, n)
@@ -1,15 +1,18 @@
-import numpy as np, pandas as pd, re
-from sklearn.metrics.pairwise import cosine_similarity
-from difflib import get_close_matches
-from core.skill_extractor import _norm, order_skills_jd_first
-from core.skill_extractor import extract_skills_whitelist, build_skill_index
+import numpy as np, re
+from core.skill_extractor import _norm
+from core.skill_extractor import extract_skills_whitelist, as_skill_index
+from core.vectors import EmbeddingStore
+from core.profiling import span
+
+EDU_LEVELS = {"PhD":3,"Masters":2,"Bachelors":1}
 
 def _onehot_edu(x):
-    m = {"PhD":3,"Masters":2,"Bachelors":1}
-    return m.get(x,0)
+    return EDU_LEVELS.get(x,0)
 
 # Determine which skills JD is actually asking for
 def extract_required_skills_from_jd(jd_text, skills):
+    skill_idx = as_skill_index(skills)
+    skills = list(skill_idx.skills)
     jd_text = jd_text.lower()
     required = []
 
@@ -24,7 +27,7 @@ def extract_required_skills_from_jd(jd_text, skills):
         # Extract nouns-like words as backup
         words = re.findall(r"[a-zA-Z]{3,}", jd_text)
         for w in words:
-            close = get_close_matches(w.lower(), skills, cutoff=0.85)
+            close = skill_idx.fuzzy.close_matches(w.lower(), cutoff=0.85)
             required.extend(close)
 
     required = list(set(required))  # unique
@@ -32,88 +35,286 @@ def extract_required_skills_from_jd(jd_text, skills):
     return required if required else skills[:15]  # ensure length ~8–12, not 40+
 
 
-def score_candidates(df, jd, skills, embedder):
-    # --- Identify JD-required skills ---
-    skill_idx = build_skill_index(skills)
-    jd_required = extract_skills_whitelist(jd, skill_idx, n_max=4, fuzzy=False)
-    jd_required_norm = set(_norm(s) for s in jd_required)
+class _NormCache(dict):
+    # skill names repeat across candidates, so each is normalized once per call
+    def __missing__(self, s):
+        v = self[s] = _norm(s)
+        return v
 
-    out = df.copy()
+def skill_matrix(skill_lists, vocab=None):
+    # Sparse candidate x skill count matrix over normalized skill names. A new
+    # vocabulary is in name order, so row sums over any subset of candidates
+    # (a shard) add up in the same order as over the whole pool.
+    from scipy import sparse
+    norm = _NormCache()
+    if vocab is None:
+        names = sorted({norm[sk] for r in skill_lists for sk in r})
+        vocab = {n: j for j, n in enumerate(names)}
+    indptr, indices = [0], []
+    for r in skill_lists:
+        for sk in r:
+            indices.append(vocab.setdefault(norm[sk], len(vocab)))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float64)
+    X = sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(vocab)))
+    X.sum_duplicates()
+    return X, vocab
 
-    # --- Mark JD skill matches / missing ---
-    out["jd_found_skills"] = out["skills_found"].apply(
-        lambda r: [s for s in r if _norm(s) in jd_required_norm]
-    )
-    out["jd_missing_skills"] = out["skills_found"].apply(
-        lambda r: sorted(list(jd_required_norm - set(_norm(s) for s in r)))
-    )
+def skill_vector(norm_skills, vocab):
+    v = np.zeros(len(vocab), dtype=np.float64)
+    for sk in norm_skills:
+        j = vocab.get(sk)
+        if j is not None:
+            v[j] = 1.0
+    return v
 
-    # Move JD-matching skills to the front for display
-    out["skills_found"] = out["skills_found"].apply(
-        lambda r: order_skills_jd_first(r, jd_required_norm)
-    )
+def rarity_vector(X):
+    # Matrix form of compute_rarity_scores: 1 - frequency / max frequency
+    freq = np.asarray(X.sum(axis=0)).ravel()
+    if not freq.size or freq.max() == 0:
+        return np.zeros(freq.shape)
+    return 1 - freq / freq.max()
 
-    # --- Embedding similarity ---
-    texts = df["clean_text"].tolist()
-    emb = embedder.encode(texts + [jd])
-    cand_emb, jd_emb = emb[:-1], emb[-1:]
-    sim = cosine_similarity(cand_emb, jd_emb).ravel()
+def rarity_lookup(rarity, vocab):
+    # Pool-independent rarity ({normalized skill: score}, e.g. SkillStats.snapshot())
+    # over the pool's skill columns; skills the stats never saw count as rarest
+    v = np.ones(len(vocab), dtype=np.float64)
+    for sk, j in vocab.items():
+        v[j] = rarity.get(sk, 1.0)
+    return v
 
-    # --- JD Skill Coverage ---
-    coverage = out["jd_found_skills"].apply(
-        lambda r: len(r) / max(1, len(jd_required))
-    )
+def top_order(scores, top_k=None):
+    n = len(scores)
+    if top_k is not None and top_k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if top_k is None or top_k >= n:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, top_k - 1)[:top_k]
+    # rows tied with the k-th score all compete, so ties go by row as in the full sort
+    cand = np.flatnonzero(scores >= scores[part].min())
+    return cand[np.argsort(-scores[cand], kind="stable")][:top_k]
 
-    # --- NEW: Skill Rarity Score ---
-    from core.skill_extractor import compute_rarity_scores
-    rarity = compute_rarity_scores(df)   # gives rarity weight per skill
+def add_skill_lists(out, jd_required_norm):
+    # Per-row list columns, built only for the rows being returned
+    norm = _NormCache()
+    rows = out["skills_found"].tolist()
+    found = [[s for s in r if norm[s] in jd_required_norm] for r in rows]
+    out["jd_found_skills"] = found
+    out["jd_missing_skills"] = [sorted(jd_required_norm - set(norm[s] for s in r)) for r in rows]
+    # Move JD-matching skills to the front for display (same order as order_skills_jd_first)
+    out["skills_found"] = [f + [s for s in r if norm[s] not in jd_required_norm] for f, r in zip(found, rows)]
+    return out
 
-    out["skill_value_score"] = out["skills_found"].apply(
-        lambda skills: sum(rarity.get(_norm(s), 0) for s in skills) / max(1, len(skills))
-    )
+DEFAULT_WEIGHTS = {
+    "similarity": 0.38,
+    "skills": 0.28,
+    "rarity": 0.14,
+    "experience": 0.08,
+    "education": 0.06,
+    "recency": 0.03,
+    "cgpa": 0.03
+}
 
-    # --- Other Normalized Factors ---
-    exp_norm = (df["years_experience"].fillna(0) / 10).clip(0, 1)
-    cgpa_norm = (df["cgpa"].fillna(0) / 10).clip(0, 1)
-    edu_norm = df["education"].fillna("Other").apply(_onehot_edu) / 3.0
-    rec_norm = df["recency"].fillna(0)
-
-    # --- Weights ---
-    w = {
-        "similarity": 0.38,
-        "skills": 0.28,
-        "rarity": 0.14,
-        "experience": 0.08,
-        "education": 0.06,
-        "recency": 0.03,
-        "cgpa": 0.03
-    }
+def _l2_rows(a):
+    from scipy import sparse
+    if sparse.issparse(a):
+        from sklearn.preprocessing import normalize
+        return normalize(sparse.csr_matrix(a, dtype=np.float32))
+    a = np.asarray(a, dtype=np.float32)
+    if a.ndim == 1:
+        a = a.reshape(1, -1)
+    n = np.linalg.norm(a, axis=1, keepdims=True)
+    n[n == 0] = 1
+    return a / n
 
-    # --- Final Score ---
-    final = (
+def _cosine(E, Q):
+    # rows of E against rows of Q (both l2-normalized, dense or sparse) -> dense (M, N)
+    S = E @ Q.T
+    S = S.toarray() if hasattr(S, "toarray") else np.asarray(S)
+    return S.astype(np.float64)
+
+class CandidatePool:
+    # Per-candidate stage: everything that does not depend on the JD or the
+    # weights (profile frame, normalized embeddings, skill matrix, rarity and
+    # the other normalized factors). Build once, then rank_pool per query.
+    # rarity=None scores skill rarity within this pool ("batch"); a
+    # {skill: rarity} mapping scores it against those stats ("snapshot").
+    def __init__(self, df, embeddings, rarity=None):
+        self.df = df.drop(columns=["raw_text"], errors="ignore").reset_index(drop=True)
+        self.store_rows = None
+        if isinstance(embeddings, EmbeddingStore):
+            # similarity reads straight from the memory-mapped store, no in-RAM copy
+            self.embeddings = embeddings
+            rows = embeddings.rows(self.df["candidate_id"])
+            if not np.array_equal(rows, np.arange(len(embeddings))):
+                self.store_rows = rows
+        else:
+            self.embeddings = _l2_rows(embeddings)
+
+        # --- Candidate x skill matrix ---
+        self.X, self.vocab = skill_matrix(self.df["skills_found"])
+        n_skills = np.asarray(self.X.sum(axis=1)).ravel()
+
+        # --- Skill Rarity Score ---
+        r = rarity_vector(self.X) if rarity is None else rarity_lookup(rarity, self.vocab)
+        self.skill_value = (self.X @ r) / np.maximum(1, n_skills)
+
+        # --- Other Normalized Factors ---
+        d = self.df
+        self.exp_norm = np.clip(d["years_experience"].fillna(0).to_numpy(dtype=float) / 10, 0, 1)
+        self.cgpa_norm = np.clip(d["cgpa"].astype(float).fillna(0).to_numpy() / 10, 0, 1)
+        self.edu_norm = d["education"].map(EDU_LEVELS).fillna(0).to_numpy(dtype=float) / 3.0
+        self.rec_norm = d["recency"].fillna(0).to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.df)
+
+    def similarity(self, Q):
+        if isinstance(self.embeddings, EmbeddingStore):
+            return self.embeddings.similarity(Q, rows=self.store_rows)
+        return _cosine(self.embeddings, Q)
+
+    def rows(self, candidate_ids):
+        if not hasattr(self, "_row_of"):
+            self._row_of = {cid: i for i, cid in enumerate(self.df["candidate_id"])}
+        return np.array([self._row_of[c] for c in candidate_ids if c in self._row_of], dtype=np.int64)
+
+    def take(self, rows):
+        # Sub-pool over the given rows; skill value keeps the full pool's rarity
+        sub = CandidatePool.__new__(CandidatePool)
+        sub.df = self.df.iloc[rows].reset_index(drop=True)
+        if isinstance(self.embeddings, EmbeddingStore):
+            sub.embeddings = self.embeddings
+            sub.store_rows = (np.arange(len(self)) if self.store_rows is None else self.store_rows)[rows]
+        else:
+            sub.embeddings, sub.store_rows = self.embeddings[rows], None
+        sub.X, sub.vocab = self.X[rows], self.vocab
+        for name in ("skill_value", "exp_norm", "cgpa_norm", "edu_norm", "rec_norm"):
+            setattr(sub, name, getattr(self, name)[rows])
+        return sub
+
+def build_pool(df, embedder, rarity=None):
+    return CandidatePool(df, embedder.encode(df["clean_text"].tolist()), rarity=rarity)
+
+def jd_requirements(jd, skill_idx):
+    jd_required = extract_skills_whitelist(jd, skill_idx, n_max=4, fuzzy=False)
+    return jd_required, set(_norm(s) for s in jd_required)
+
+def _weighted(w, sim, coverage, pool):
+    # sim / coverage are (M,) for one JD or (M, N) for N JDs; per-candidate factors broadcast
+    c = (lambda a: a) if np.ndim(sim) == 1 else (lambda a: a[:, None])
+    return (
         w["similarity"] * sim +
         w["skills"] * coverage +
-        w["rarity"] * out["skill_value_score"] +
-        w["experience"] * exp_norm +
-        w["education"] * edu_norm +
-        w["recency"] * rec_norm +
-        w["cgpa"] * cgpa_norm
+        w["rarity"] * c(pool.skill_value) +
+        w["experience"] * c(pool.exp_norm) +
+        w["education"] * c(pool.edu_norm) +
+        w["recency"] * c(pool.rec_norm) +
+        w["cgpa"] * c(pool.cgpa_norm)
     )
 
+def _ranked_frame(pool, order, sim, coverage, final, jd_required_norm, skill_lists=True):
+    # Copy only the returned rows
+    out = pool.df.iloc[order].reset_index(drop=True)
+    if skill_lists:
+        out = add_skill_lists(out, jd_required_norm)
+
     # Save Scores
-    out["jd_similarity"] = sim
-    out["skill_coverage"] = coverage
-    out["skill_rarity_score"] = out["skill_value_score"]
-    out["edu_score"] = edu_norm
-    out["exp_score"] = exp_norm
-    out["recency_score"] = rec_norm
-    out["cgpa_score"] = cgpa_norm
-    out["final_score"] = final
+    out["skill_value_score"] = pool.skill_value[order]
+    out["jd_similarity"] = sim[order]
+    out["skill_coverage"] = coverage[order]
+    out["skill_rarity_score"] = pool.skill_value[order]
+    out["edu_score"] = pool.edu_norm[order]
+    out["exp_score"] = pool.exp_norm[order]
+    out["recency_score"] = pool.rec_norm[order]
+    out["cgpa_score"] = pool.cgpa_norm[order]
+    out["final_score"] = final[order]
+    out.attrs["jd_required"] = sorted(jd_required_norm)
+    return out
+
+def rank_pool(pool, jd, skills, embedder, weights=None, top_k=None, jd_emb=None, skill_lists=True):
+    # Per-query stage: JD skills, similarity and the weighted sum.
+    # skill_lists=False leaves the JD found/missing columns out; callers that only
+    # show a few rows build them later with add_skill_lists(rows, set(out.attrs["jd_required"]))
+    return _rank_pool(pool, jd, skills, embedder, weights, top_k, jd_emb, skill_lists)[0]
+
+def _rank_pool(pool, jd, skills, embedder, weights=None, top_k=None, jd_emb=None, skill_lists=True):
+    # rank_pool plus the pool rows of the ranked frame, for merging shard results
+    with span("rank.jd_skills"):
+        jd_required, jd_required_norm = jd_requirements(jd, as_skill_index(skills))
+
+    # --- Embedding similarity ---
+    if jd_emb is None:
+        with span("rank.jd_encode"):
+            jd_emb = embedder.encode_query([jd])
+    with span("rank.similarity"):
+        sim = pool.similarity(_l2_rows(jd_emb)).ravel()
+
+    # --- JD Skill Coverage ---
+    with span("rank.coverage"):
+        coverage = (pool.X @ skill_vector(jd_required_norm, pool.vocab)) / max(1, len(jd_required))
+
+    # --- Final Score ---
+    with span("rank.weighted"):
+        final = _weighted({**DEFAULT_WEIGHTS, **(weights or {})}, sim, coverage, pool)
 
     # Rank Top to Bottom
-    out = out.sort_values(by="final_score", ascending=False).reset_index(drop=True)
+    with span("rank.frame"):
+        order = top_order(final, top_k)
+        return _ranked_frame(pool, order, sim, coverage, final, jd_required_norm, skill_lists), order
+
+def rank_pool_multi(pool, jds, skills, embedder, weights=None, top_k=10, jd_emb=None):
+    # Rank one pool against N JDs: one encode call for the JDs, then M x N
+    # similarity and coverage matrices and one top-k per column.
+    # Returns a list of ranked frames in the order of `jds`.
+    skill_idx = as_skill_index(skills)
+    with span("rank.jd_skills"):
+        reqs = [jd_requirements(jd, skill_idx) for jd in jds]
+
+    # --- Embedding similarity (M x N) ---
+    if jd_emb is None:
+        with span("rank.jd_encode"):
+            jd_emb = embedder.encode_query(list(jds))
+    with span("rank.similarity"):
+        S = pool.similarity(_l2_rows(jd_emb))
+
+    # --- JD Skill Coverage (M x N) ---
+    with span("rank.coverage"):
+        J = np.zeros((len(pool.vocab), len(jds)), dtype=np.float64)
+        for n, (_, norm_set) in enumerate(reqs):
+            J[:, n] = skill_vector(norm_set, pool.vocab)
+        C = np.asarray(pool.X @ J) / np.array([max(1, len(r)) for r, _ in reqs], dtype=np.float64)
+
+    # --- Final Score (M x N) ---
+    with span("rank.weighted"):
+        F = _weighted({**DEFAULT_WEIGHTS, **(weights or {})}, S, C, pool)
+
+    out = []
+    with span("rank.frame"):
+        for n, (_, norm_set) in enumerate(reqs):
+            f = F[:, n]
+            out.append(_ranked_frame(pool, top_order(f, top_k), S[:, n], C[:, n], f, norm_set))
     return out
 
+def rank_shortlist(index, pool, jd, skills, embedder, shortlist=500, weights=None, top_k=None):
+    # Retrieve the `shortlist` nearest candidates from a core.index vector
+    # index, then run the full weighted scoring only on those.
+    if not embedder.model:
+        raise TypeError("rank_shortlist needs a dense embedding model; use rank_pool with the TF-IDF fallback")
+    jd_emb = embedder.encode_query([jd])
+    ids, _ = index.search(jd_emb, shortlist)
+    return rank_pool(pool.take(pool.rows(ids)), jd, skills, embedder, weights=weights, top_k=top_k, jd_emb=jd_emb)
+
+def score_candidates(df, jd, skills, embedder, weights=None, top_k=None):
+    # One-shot ranking; only the candidates count towards the TF-IDF corpus
+    pool = CandidatePool(df, embedder.encode(df["clean_text"].tolist()))
+    return rank_pool(pool, jd, skills, embedder, weights=weights, top_k=top_k)
+
+def score_candidates_multi(df, jds, skills, embedder, weights=None, top_k=10):
+    # Candidates, then all JDs in one query batch
+    pool = CandidatePool(df, embedder.encode(df["clean_text"].tolist()))
+    return rank_pool_multi(pool, jds, skills, embedder, weights=weights, top_k=top_k)
+
 
 def explain_candidate(row):
     jd_set = set(_norm(s) for s in row.get("jd_found_skills", []))
@@ -123,6 +324,7 @@ def explain_candidate(row):
     parts.append(f"Internship Experience: {row['months_experience']} months ({row['years_experience']:.2f} years)")
     parts.append(f"Education Level Score: {row['edu_score']:.2f}")
     parts.append(f"Recency Score: {row['recency_score']:.2f}")
+    import pandas as pd
     if row.get("cgpa") and not pd.isna(row["cgpa"]):
         parts.append(f"CGPA: {row['cgpa']:.2f}")
     else:
@@ -0,0 +1,96 @@
+import json, os
+from core.cache import text_hash
+from core.skill_extractor import _norm
+
+RARITY_MODES = ("batch", "snapshot")
+SKILL_STATS_PATH = ".cache/skill_stats.json"
+
+class SkillStats:
+    # Running document frequency per normalized skill over every candidate ever
+    # added, so rarity no longer depends on which resumes share an upload.
+    # Candidates are keyed (text_hash of the cleaned text) and their skill sets
+    # kept: add() of a known key only applies the difference, remove() subtracts
+    # exactly what was added. Both are O(skills of that candidate); the max
+    # frequency is tracked with a frequency histogram so removals stay O(1) per skill.
+    # rarity = 1 - df / max df, as compute_rarity_scores over one batch.
+    def __init__(self, path=None):
+        self.path = path
+        self.members = {}
+        self.doc_freq = {}
+        self.max_df = 0
+        self._hist = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                for key, skills in json.load(fh)["members"].items():
+                    self._apply(key, frozenset(skills))
+            self._dirty = False
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, key):
+        return key in self.members
+
+    def _bump(self, skill, d):
+        f = self.doc_freq.get(skill, 0)
+        if f:
+            self._hist[f] -= 1
+            if not self._hist[f]:
+                del self._hist[f]
+        f += d
+        if f:
+            self.doc_freq[skill] = f
+            self._hist[f] = self._hist.get(f, 0) + 1
+        else:
+            del self.doc_freq[skill]
+        if d > 0:
+            self.max_df = max(self.max_df, f)
+        elif not self._hist.get(self.max_df):
+            # the only skills at the max just dropped by one
+            self.max_df -= 1
+
+    def _apply(self, key, new):
+        old = self.members.get(key, frozenset())
+        if new == old:
+            return False
+        for s in old - new:
+            self._bump(s, -1)
+        for s in new - old:
+            self._bump(s, 1)
+        if new:
+            self.members[key] = new
+        else:
+            self.members.pop(key, None)
+        self._dirty = True
+        return True
+
+    def add(self, key, skills):
+        return self._apply(key, frozenset(_norm(s) for s in skills))
+
+    def remove(self, key):
+        return self._apply(key, frozenset())
+
+    def add_frame(self, df):
+        # profile frame (clean_text, skills_found) -> number of candidates new or changed
+        return sum(self.add(text_hash(t), s) for t, s in zip(df["clean_text"], df["skills_found"]))
+
+    def rarity(self, skill):
+        return 1 - self.doc_freq.get(_norm(skill), 0) / self.max_df if self.max_df else 1.0
+
+    def snapshot(self):
+        # {normalized skill: rarity} as of now, for CandidatePool(rarity=...);
+        # skills never seen score 1.0
+        return {s: 1 - f / self.max_df for s, f in self.doc_freq.items()}
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"members": {k: sorted(v) for k, v in self.members.items()}}, fh)
+        os.replace(tmp, self.path)
+        self._dirty = False
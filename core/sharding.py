@@ -0,0 +1,306 @@
+import heapq, itertools, multiprocessing, os
+import numpy as np
+from core.cache import text_hash, EmbeddingCache
+from core.dedup import Deduper, exact_key
+from core.embedding import Embedder, HashingTfidf, DEFAULT_MODEL
+from core.skill_extractor import load_skill_index, _norm, TAXONOMY_PATH
+from core.profiling import span
+
+# Sharded ranking for pools too large for one process or machine. Each shard
+# holds one partition (profiles, embeddings, skill matrix) in its own process
+# and the coordinator only ever sees statistics and partial top-k lists:
+#   load   1. shards parse their files, drop near and exact duplicates within
+#             the shard with a Deduper, profile the rest and return two keys
+#             per candidate: Deduper's exact key and the text_hash of the
+#             cleaned text
+#          2. the first occurrence of an exact key keeps it (later ones are
+#             duplicates across shards) and the first kept occurrence of a
+#             cleaned text owns it; shards return skill counts over their
+#             candidates and TF-IDF document counts over the texts they own
+#          3. the merged rarity table and TF-IDF counts go back to every shard,
+#             which embeds its candidates and builds a CandidatePool
+#   rank   the JD is encoded once here; each shard returns its own top-k and
+#          heapq.merge over (score, global row) picks the global top-k
+# The ranking is the one rank_pool gives for all candidates in one pool, in
+# shard order, except that near duplicates are only found within a shard.
+# Shards talk over multiprocessing connections: local processes
+# (ShardedRanker.local) or nodes started with `python -m core.sharding`.
+
+class Shard:
+    def __init__(self, taxonomy=TAXONOMY_PATH, model=DEFAULT_MODEL, cache=None, tfidf_path=None, pooling=None):
+        self.skills = load_skill_index(taxonomy)
+        self.embedder = Embedder(model, cache=EmbeddingCache(cache) if cache else None, tfidf_path=tfidf_path)
+        self.pooling = pooling
+        self.df = self.pool = self.tfidf = None
+
+    def load(self, paths=(), root=None, texts=None, timeout=30, dedup_threshold=None):
+        from core.utils import extract_texts
+        from core.pipeline import profile_frame
+        if texts is None:
+            items = []
+            for p in paths:
+                with open(p, "rb") as fh:
+                    items.append((os.path.relpath(p, root) if root else p, fh.read()))
+            texts = extract_texts(items, timeout=timeout)
+        pairs = []
+        if dedup_threshold is not None:
+            deduper = Deduper(threshold=dedup_threshold)
+            texts = deduper.filter(texts)
+            pairs = deduper.pairs
+        df = profile_frame(texts, self.skills)
+        self.df = df.drop(columns=["raw_text"]) if len(df) else None
+        self.pool = None
+        if self.df is None:
+            return {"names": [], "keys": [], "docs": [], "pairs": pairs}
+        return {"names": df["candidate_id"].tolist(), "keys": [exact_key(t) for t in df["raw_text"]],
+                "docs": [text_hash(t) for t in df["clean_text"]], "pairs": pairs}
+
+    def stats(self, keep, own, members=False):
+        if self.df is None:
+            return {"skills": {}, "tfidf": None, "members": []}
+        own = np.asarray(own, dtype=bool)
+        owned = self.df[own]
+        self.df = self.df[np.asarray(keep, dtype=bool)].reset_index(drop=True)
+        counts = {}
+        for r in self.df["skills_found"]:
+            for s in r:
+                s = _norm(s)
+                counts[s] = counts.get(s, 0) + 1
+        out = {"skills": counts, "tfidf": None, "members": []}
+        if not self.embedder.model:
+            self.tfidf = HashingTfidf(self.embedder.tfidf_path)
+            out["tfidf"] = self.tfidf.doc_counts(owned["clean_text"].tolist())
+        if members:
+            out["members"] = [(text_hash(t), s) for t, s in zip(owned["clean_text"], owned["skills_found"])]
+        return out
+
+    def prepare(self, rarity, tfidf=None):
+        from core.pipeline import encode_texts
+        from core.ranking import CandidatePool
+        if self.df is None or not len(self.df):
+            return 0
+        texts = self.df["clean_text"].tolist()
+        if self.embedder.model:
+            emb = encode_texts(self.embedder, texts, self.pooling)
+        else:
+            # the TF-IDF state every shard and the coordinator share for this pool
+            self.tfidf.merge(*tfidf)
+            emb = self.tfidf.transform(texts)
+        self.pool = CandidatePool(self.df, emb, rarity=rarity)
+        return len(self.pool)
+
+    def rank(self, jd, jd_emb, weights=None, top_k=None):
+        from core.ranking import _rank_pool
+        if self.pool is None:
+            return None, []
+        out, rows = _rank_pool(self.pool, jd, self.skills, self.embedder, weights=weights, top_k=top_k, jd_emb=jd_emb)
+        return out.drop(columns=["clean_text"]), rows
+
+def serve_shard(conn):
+    # (method, kwargs) requests -> ("ok", result) | ("error", message), until "close" or EOF
+    shard = None
+    while True:
+        try:
+            method, kwargs = conn.recv()
+        except EOFError:
+            break
+        if method == "close":
+            conn.send(("ok", None))
+            break
+        try:
+            if method == "init":
+                shard, result = Shard(**kwargs), None
+            else:
+                result = getattr(shard, method)(**kwargs)
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+def serve_node(host, port, authkey):
+    # one coordinator at a time; the partition lives until it disconnects
+    from multiprocessing.connection import Listener
+    with Listener((host, port), authkey=authkey) as listener:
+        while True:
+            serve_shard(listener.accept())
+
+class ShardError(RuntimeError):
+    pass
+
+class ShardedRanker:
+    def __init__(self, conns, taxonomy=TAXONOMY_PATH, model=DEFAULT_MODEL, cache=None, tfidf_path=None,
+                 pooling=None, stats=None):
+        # stats: a SkillStats to score rarity against ("snapshot"); None scores
+        # it over all shards' candidates together ("batch")
+        self.conns = list(conns)
+        self.procs = []
+        self.skills = load_skill_index(taxonomy)
+        self.embedder = Embedder(model, cache=EmbeddingCache(cache) if cache else None, tfidf_path=tfidf_path)
+        self.stats = stats
+        self.offsets = None
+        self.pairs = []
+        self._call("init", dict(taxonomy=taxonomy, model=model, cache=cache, tfidf_path=tfidf_path, pooling=pooling))
+
+    @classmethod
+    def local(cls, n, **kwargs):
+        # n spawned processes standing in for nodes
+        ctx = multiprocessing.get_context("spawn")
+        conns, procs = [], []
+        for _ in range(n):
+            here, there = ctx.Pipe()
+            p = ctx.Process(target=serve_shard, args=(there,), daemon=True)
+            p.start()
+            there.close()
+            conns.append(here)
+            procs.append(p)
+        try:
+            ranker = cls(conns, **kwargs)
+        except BaseException:
+            for p in procs:
+                p.kill()
+            raise
+        ranker.procs = procs
+        return ranker
+
+    @classmethod
+    def connect(cls, addresses, authkey, **kwargs):
+        from multiprocessing.connection import Client
+        return cls([Client(a, authkey=authkey) for a in addresses], **kwargs)
+
+    def __len__(self):
+        return len(self.conns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _call(self, method, kwargs):
+        # kwargs: one dict for every shard, or a list with one per shard; all
+        # shards work concurrently and every reply is read before raising
+        per = kwargs if isinstance(kwargs, list) else [kwargs] * len(self.conns)
+        for conn, kw in zip(self.conns, per):
+            conn.send((method, kw))
+        replies = [conn.recv() for conn in self.conns]
+        errors = [f"shard {i}: {v}" for i, (status, v) in enumerate(replies) if status == "error"]
+        if errors:
+            raise ShardError("; ".join(errors))
+        return [v for _, v in replies]
+
+    def load(self, partitions, root=None, dedup=True, dedup_threshold=0.85, timeout=30):
+        # partitions: one list of resume paths per shard
+        with span("shard.load"):
+            loaded = self._call("load", [{"paths": p, "root": root, "timeout": timeout,
+                                          "dedup_threshold": dedup_threshold if dedup else None}
+                                         for p in partitions])
+        # self.pairs: (kept, duplicate, match, similarity) as Deduper.pairs
+        local = [tuple(p) for part in loaded for p in part["pairs"]]
+        self.pairs, moved = [], {}
+        first, docs, keep, own = {}, set(), [], []
+        for part in loaded:
+            k, o = [], []
+            for name, key, doc in zip(part["names"], part["keys"], part["docs"]):
+                kept = not dedup or key is None or key not in first
+                if kept and key is not None:
+                    first.setdefault(key, name)
+                elif not kept:
+                    self.pairs.append((first[key], name, "exact", 1.0))
+                    moved[name] = first[key]
+                k.append(kept)
+                o.append(kept and doc not in docs)
+                if kept:
+                    docs.add(doc)
+            keep.append(k)
+            own.append(o)
+        # a shard's kept resume that duplicates one in an earlier shard hands its duplicates on
+        self.pairs = [(moved.get(kept, kept), dup, m, sim) for kept, dup, m, sim in local] + self.pairs
+
+        with span("shard.stats"):
+            parts = self._call("stats", [{"keep": k, "own": o, "members": self.stats is not None}
+                                         for k, o in zip(keep, own)])
+        if self.stats is not None:
+            for p in parts:
+                for k, s in p["members"]:
+                    self.stats.add(k, s)
+            self.stats.save()
+            rarity = self.stats.snapshot()
+        else:
+            # compute_rarity_scores over the union of the shards
+            total = {}
+            for p in parts:
+                for s, c in p["skills"].items():
+                    total[s] = total.get(s, 0) + c
+            top = max(total.values(), default=0)
+            rarity = {s: 1 - c / top for s, c in total.items()} if top else {}
+
+        tfidf = None
+        if not self.embedder.model:
+            found = [p["tfidf"] for p in parts if p["tfidf"] is not None]
+            tfidf = (np.concatenate([f[0] for f in found]) if found else np.zeros(0, dtype=np.int64),
+                     np.concatenate([f[1] for f in found]) if found else np.zeros(0, dtype=np.int64),
+                     [k for f in found for k in f[2]])
+            self.embedder.tfidf = HashingTfidf(self.embedder.tfidf_path)
+            if tfidf[2]:
+                self.embedder.tfidf.merge(*tfidf)
+                self.embedder.tfidf.save()
+
+        with span("shard.prepare"):
+            sizes = self._call("prepare", {"rarity": rarity, "tfidf": tfidf})
+        self.offsets = np.r_[0, np.cumsum(sizes)[:-1]].astype(int).tolist()
+        return {"shards": len(self), "candidates": int(sum(sizes)), "sizes": sizes, "duplicates": len(self.pairs)}
+
+    def rank(self, jd, weights=None, top_k=None):
+        import pandas as pd
+        jd_emb = self.embedder.encode_query([jd])
+        with span("shard.rank"):
+            parts = self._call("rank", {"jd": jd, "jd_emb": jd_emb, "weights": weights, "top_k": top_k})
+        with span("shard.merge"):
+            frames = [df for df, _ in parts if df is not None]
+            # each partial list is sorted by (-score, row); global rows break ties as one pool would
+            streams, base = [], 0
+            for off, (df, rows) in zip(self.offsets, parts):
+                if df is None:
+                    continue
+                streams.append(zip(-df["final_score"].to_numpy(), np.asarray(rows) + off,
+                                   range(base, base + len(df))))
+                base += len(df)
+            if not frames:
+                return pd.DataFrame()
+            picked = [i for _, _, i in itertools.islice(heapq.merge(*streams), top_k)]
+            out = pd.concat(frames, ignore_index=True).iloc[picked].reset_index(drop=True)
+            out.attrs["jd_required"] = frames[0].attrs.get("jd_required", [])
+            return out
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+                conn.recv()
+            except (EOFError, OSError):
+                pass
+            conn.close()
+        for p in self.procs:
+            p.join(timeout=10)
+        self.conns, self.procs = [], []
+
+def partition(items, n):
+    # n contiguous, near-equal parts, so shard order is the original order
+    step, extra = divmod(len(items), n)
+    out, i = [], 0
+    for s in range(n):
+        j = i + step + (s < extra)
+        out.append(items[i:j])
+        i = j
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Serve one ranking shard to a ShardedRanker coordinator.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=7101)
+    args = ap.parse_args()
+    key = os.environ.get("SHARD_AUTHKEY")
+    if not key:
+        raise SystemExit("set SHARD_AUTHKEY to the key shared with the coordinator")
+    serve_node(args.host, args.port, key.encode())
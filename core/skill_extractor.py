@@ -1,11 +1,15 @@
-import re
+import hashlib, json, math, os, re
 from difflib import get_close_matches
+from functools import lru_cache
+from types import MappingProxyType
 
 def _norm(s):
     return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9\+\.\- ]", " ", s.lower())).strip()
 
-def build_skill_index(skills, synonyms=None):
-    synonyms = {
+TAXONOMY_PATH = "models/skills_taxonomy.txt"
+
+# Single synonym source for every skill index (canonical skill -> alternate spellings)
+SYNONYMS = {
     "power bi": ["powerbi", "ms power bi"],
     "scikit-learn": ["sklearn", "scikit learn"],
     "pytorch": ["py torch"],
@@ -14,16 +18,24 @@ def build_skill_index(skills, synonyms=None):
     "postgresql": ["postgres", "postgre sql"],
     "huggingface": ["hugging face"],
     "computer vision": ["cv"],
+    "nlp": ["natural language processing"],
     "rest api": ["restful api", "rest apis"],
     "fastapi": ["fast api"],
-    "docker": ["container", "containers"],
+    "opencv": ["open cv"],
+    "docker": ["container", "containers", "containerization"],
     "kubernetes": ["k8s"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
     "mlops": ["ml ops"],
     "etl": ["extract transform load"],
     "llm": ["large language model", "large language models"],
     "rag": ["retrieval augmented generation"],
     "eda": ["exploratory data analysis","data analysis","data cleaning"]
-    }
+}
+
+def build_skill_index(skills, synonyms=None):
+    if synonyms is None:
+        synonyms = SYNONYMS
 
     idx = {}
     base = set()
@@ -42,6 +54,118 @@ def build_skill_index(skills, synonyms=None):
                         idx[ak] = idx[c]
     return idx
 
+def skill_fingerprint(skills, synonyms):
+    payload = json.dumps([list(skills), sorted((k, list(v)) for k, v in synonyms.items())])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+class FuzzyIndex:
+    # Character-trigram postings over a fixed word list. close_matches() returns
+    # exactly what difflib.get_close_matches(word, words, n, cutoff) would, but
+    # only scores the words that can reach `cutoff`: a difflib ratio >= c bounds
+    # the length of a match and its indel distance D <= (a + b) * (1 - c), and
+    # each indel destroys at most 3 of the query's padded trigrams, so a match
+    # shares at least a + 2 - 3 * D of them. Results are memoized per word.
+    def __init__(self, words, max_cache=50_000):
+        self.words = list(words)
+        self.lengths = [len(w) for w in self.words]
+        self.postings = {}
+        for i, w in enumerate(self.words):
+            for g, c in self._grams(w).items():
+                self.postings.setdefault(g, []).append((i, c))
+        self.by_length = {}
+        for i, n in enumerate(self.lengths):
+            self.by_length.setdefault(n, []).append(i)
+        self.max_cache = max_cache
+        self._cache = {}
+
+    @staticmethod
+    def _grams(w):
+        p = "\x01\x01" + w + "\x02\x02"
+        out = {}
+        for i in range(len(p) - 2):
+            g = p[i:i+3]
+            out[g] = out.get(g, 0) + 1
+        return out
+
+    def _candidates(self, word, cutoff):
+        if cutoff <= 0:
+            return self.words
+        a, loss = len(word), 1 - cutoff
+        lo = math.ceil(a * cutoff / (2 - cutoff) - 1e-9)
+        hi = math.floor(a * (2 - cutoff) / cutoff + 1e-9)
+        if a + 2 - 3 * math.floor((a + hi) * loss + 1e-9) <= 0:
+            # too short or too loose a cutoff for the trigram bound: scan the length window
+            ids = [i for n in range(lo, hi + 1) for i in self.by_length.get(n, ())]
+        else:
+            shared = {}
+            for g, c in self._grams(word).items():
+                for i, ck in self.postings.get(g, ()):
+                    shared[i] = shared.get(i, 0) + min(c, ck)
+            ids = [i for i, s in shared.items() if lo <= self.lengths[i] <= hi
+                   and s >= a + 2 - 3 * math.floor((a + self.lengths[i]) * loss + 1e-9)]
+        return [self.words[i] for i in sorted(ids)]
+
+    def close_matches(self, word, n=3, cutoff=0.6):
+        key = (word, n, cutoff)
+        hit = self._cache.get(key)
+        if hit is None:
+            if len(self._cache) >= self.max_cache:
+                self._cache.clear()
+            hit = self._cache[key] = get_close_matches(word, self._candidates(word, cutoff), n, cutoff)
+        return list(hit)
+
+class SkillIndex:
+    # Immutable, precompiled skill index: taxonomy + synonyms -> normalized lookup
+    # and token-trie matcher. Build it once per taxonomy and pass it down the
+    # pipeline; `fingerprint` changes whenever the taxonomy or synonyms do.
+    # `fuzzy` looks up close matches among the raw skill names.
+    __slots__ = ("skills", "synonyms", "index", "matcher", "fuzzy", "fingerprint")
+
+    def __init__(self, skills, synonyms=None):
+        synonyms = SYNONYMS if synonyms is None else synonyms
+        skills = tuple(skills)
+        index = MappingProxyType(build_skill_index(skills, synonyms))
+        object.__setattr__(self, "skills", skills)
+        object.__setattr__(self, "synonyms", MappingProxyType({k: tuple(v) for k, v in synonyms.items()}))
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "matcher", SkillMatcher(index))
+        object.__setattr__(self, "fuzzy", FuzzyIndex(skills))
+        object.__setattr__(self, "fingerprint", skill_fingerprint(skills, synonyms))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SkillIndex is immutable")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __reduce__(self):
+        # rebuilt from taxonomy + synonyms when shipped to worker processes
+        return (SkillIndex, (self.skills, dict(self.synonyms)))
+
+    def __repr__(self):
+        return f"SkillIndex({len(self.skills)} skills, {len(self.index)} keys, fingerprint={self.fingerprint})"
+
+_LOADED = {}
+
+def load_skill_index(path=TAXONOMY_PATH):
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    idx = _LOADED.get(key)
+    if idx is None:
+        with open(path, "r", encoding="utf-8") as fh:
+            skills = [s.strip() for s in fh.readlines() if s.strip()]
+        idx = _LOADED[key] = SkillIndex(skills)
+    return idx
+
+@lru_cache(maxsize=8)
+def _index_for(skills):
+    return SkillIndex(skills)
+
+def as_skill_index(skills):
+    if isinstance(skills, SkillIndex):
+        return skills
+    return _index_for(tuple(skills))
+
 def compute_rarity_scores(df):
     from collections import Counter
 
@@ -60,26 +184,66 @@ def _ngrams(tokens, n_max=4):
         for i in range(L - n + 1):
             yield " ".join(tokens[i:i+n])
 
+class SkillMatcher:
+    # Token trie over the skill index keys. Every key is a run of whitespace
+    # separated tokens, so walking the trie from each token position finds the
+    # same matches as looking up every 1..n_max-gram, without building them.
+    def __init__(self, skill_index):
+        self.index = skill_index
+        self.trie = {}
+        for key, canon in skill_index.items():
+            node = self.trie
+            for tok in key.split(" "):
+                node = node.setdefault(tok, {})
+            node[None] = (key, canon)
+        self._fuzzy = None
+
+    @property
+    def fuzzy(self):
+        # close-match lookup over the index keys, built on first fuzzy use
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex(self.index.keys())
+        return self._fuzzy
+
+    def find(self, tokens, n_max=4):
+        trie = self.trie
+        L = len(tokens)
+        hits = {}
+        for i in range(L):
+            node = trie.get(tokens[i])
+            j = i + 1
+            while node is not None:
+                leaf = node.get(None)
+                if leaf is not None:
+                    hits[leaf[0]] = leaf[1]
+                if j >= L or j - i >= n_max:
+                    break
+                node = node.get(tokens[j])
+                j += 1
+        return hits
+
+def compile_skill_matcher(skill_index):
+    if isinstance(skill_index, SkillIndex):
+        return skill_index.matcher
+    return skill_index if isinstance(skill_index, SkillMatcher) else SkillMatcher(skill_index)
+
 def extract_skills_whitelist(text, skill_index, n_max=4, fuzzy=False):
+    matcher = compile_skill_matcher(skill_index)
     t = _norm(text)
     toks = [x for x in t.split() if x]
-    found = []
-    seen = set()
-    for g in _ngrams(toks, n_max=n_max):
-        if g in skill_index and g not in seen:
-            seen.add(g)
-            found.append(skill_index[g])
+    hits = matcher.find(toks, n_max=n_max)
+    seen = set(hits)
+    found = list(hits.values())
     if fuzzy:
-        keys = list(skill_index.keys())
         for token in toks:
             if len(token) < 4:
                 continue
-            matches = get_close_matches(token, keys, n=1, cutoff=0.92)
+            matches = matcher.fuzzy.close_matches(token, n=1, cutoff=0.92)
             if matches:
                 k = matches[0]
                 if k not in seen:
                     seen.add(k)
-                    found.append(skill_index[k])
+                    found.append(matcher.index[k])
     found = sorted(set(found), key=lambda s: s.lower())
     return found
 
@@ -0,0 +1,290 @@
+import hashlib, json, os, sqlite3, threading, time
+import numpy as np
+from core.utils import extract_texts, list_resumes, _named_bytes
+from core.cache import text_hash
+from core.profiling import span
+
+FIELDS = ["years_experience", "months_experience", "education", "email", "phone",
+          "skills_found", "recency", "cgpa", "total_skills_found"]
+PROFILE_COLS = ["clean_text"] + FIELDS
+
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+def _model_key(embedder, pooling):
+    # chunk-pooled vectors differ from whole-text ones, so they are stored apart
+    return embedder.model_name + (f"#{pooling}" if pooling else "")
+
+def _field_values(r):
+    # extract_profile output -> FIELDS as stored (skills as JSON, missing CGPA as NULL)
+    cgpa = r["cgpa"]
+    return (r["years_experience"], r["months_experience"], r["education"], r["email"], r["phone"],
+            json.dumps(r["skills_found"]), r["recency"], None if cgpa is None or cgpa != cgpa else cgpa,
+            r["total_skills_found"])
+
+class CandidateStore:
+    # Parsed candidates that survive restarts, keyed by the sha1 of the file bytes.
+    #   candidates: cleaned text, extract_profile fields (skills_found as JSON),
+    #               the skill-index fingerprint they were extracted with, and the
+    #               dense embedding with its model name (NULL for the TF-IDF
+    #               fallback, whose vectors change as its IDF grows)
+    #   files:      path -> (size, mtime_ns, hash) for sync(); a store mirrors one folder
+    # A file is parsed once per distinct content; profiles are re-extracted from
+    # the stored text when the taxonomy changes, embeddings when the model does.
+    # With a Deduper, ingest() and sync() drop duplicates after parsing and before
+    # profiles, embeddings and stats: their content is not stored, and files
+    # keep mapping to their own content hash.
+    # With `stats` (a SkillStats), skill frequencies follow every candidate added,
+    # re-profiled or dropped, and are saved alongside. The app shares one store
+    # (and its stats) across sessions, so stats are only touched under _lock.
+    def __init__(self, path=".cache/candidates.sqlite", stats=None):
+        self.path = path
+        self.stats = stats
+        self._lock = threading.Lock()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS candidates ("
+            "hash TEXT PRIMARY KEY, clean_text TEXT, years_experience REAL, months_experience INTEGER, "
+            "education TEXT, email TEXT, phone TEXT, skills_found TEXT, recency REAL, cgpa REAL, "
+            "total_skills_found INTEGER, skills_fp TEXT, model TEXT, dim INTEGER, embedding BLOB, added REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)"
+        )
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def _known(self, hashes):
+        hashes = list(set(hashes))
+        found = set()
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i+500]
+                q = "SELECT hash FROM candidates WHERE hash IN (%s)" % ",".join("?" * len(part))
+                found.update(h for (h,) in self._db.execute(q, part))
+        return found
+
+    def _rows(self, hashes, cols):
+        hashes = list(set(hashes))
+        out = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i+500]
+                q = "SELECT hash, %s FROM candidates WHERE hash IN (%s)" % (", ".join(cols), ",".join("?" * len(part)))
+                for r in self._db.execute(q, part):
+                    out[r[0]] = dict(zip(cols, r[1:]))
+        return out
+
+    def _put_profiles(self, df, hashes, skills, model=None, emb=None):
+        dense = emb is not None and not hasattr(emb, "tocsr")
+        model = model if dense else None
+        now = time.time()
+        rows = []
+        for i, (h, r) in enumerate(zip(hashes, df.to_dict("records"))):
+            vec = np.asarray(emb[i], dtype=np.float32) if dense else None
+            rows.append((h, r["clean_text"], *_field_values(r), skills.fingerprint, model,
+                         None if vec is None else vec.shape[-1], None if vec is None else vec.tobytes(), now))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO candidates VALUES (%s)" % ",".join("?" * 16), rows)
+            self._db.commit()
+            if self.stats is not None:
+                self.stats.add_frame(df)
+
+    def ingest(self, files, skills, embedder=None, workers=None, timeout=30, pooling=None, deduper=None):
+        # files: (name, bytes) pairs or uploaded file objects, as for extract_texts.
+        # Parses and profiles only content not in the store; returns {name: hash},
+        # without the names `deduper` dropped.
+        hashes = self._ingest(files, skills, embedder, workers, timeout, pooling, deduper)[0]
+        self._save_stats()
+        if deduper is not None:
+            dropped = {dup for _, dup, _, _ in deduper.pairs}
+            hashes = {name: h for name, h in hashes.items() if name not in dropped}
+        return hashes
+
+    def _save_stats(self):
+        if self.stats is not None:
+            with self._lock:
+                self.stats.save()
+
+    def _ingest(self, files, skills, embedder, workers, timeout, pooling, deduper=None):
+        from core.pipeline import profile_frame, encode_texts
+        items = [_named_bytes(i, f) for i, f in enumerate(files)]
+        hashes = {name: content_hash(data) for name, data in items}
+        known = self._known(hashes.values())
+        todo, seen = [], set()
+        for name, data in items:
+            h = hashes[name]
+            if h not in known and h not in seen:
+                seen.add(h)
+                todo.append((h, data, name))
+        texts = {}
+        if todo:
+            with span("store.ingest"):
+                # parse once per content hash; the name keeps its extension, which picks the reader
+                named = {h + os.path.splitext(name)[1].lower(): h for h, _, name in todo}
+                texts = extract_texts([(h + os.path.splitext(name)[1].lower(), data) for h, data, name in todo],
+                                      workers=workers, timeout=timeout)
+                texts = {named[n]: t for n, t in texts.items()}
+        if deduper is not None:
+            # every name in file order; stored content is compared by its cleaned text,
+            # which only differs from the parsed text in whitespace
+            stored = self.texts({name: h for name, h in hashes.items() if h in known})
+            kept = deduper.filter({name: stored[name] if name in stored else texts[hashes[name]]
+                                   for name, _ in items if name in stored or hashes[name] in texts})
+            keep = {hashes[name] for name in kept}
+            texts = {h: t for h, t in texts.items() if h in keep}
+        if texts:
+            with span("store.ingest"):
+                df = profile_frame(texts, skills, workers=workers)
+                emb = model = None
+                if embedder is not None and embedder.model:
+                    emb = encode_texts(embedder, df["clean_text"].tolist(), pooling)
+                    model = _model_key(embedder, pooling)
+                self._put_profiles(df, df["candidate_id"].tolist(), skills, model, emb)
+        return hashes, len(todo)
+
+    def texts(self, hashes):
+        # {name: hash} -> {name: clean_text}
+        rows = self._rows(hashes.values(), ["clean_text"])
+        return {name: rows[h]["clean_text"] for name, h in hashes.items() if h in rows}
+
+    def frame(self, hashes, skills):
+        # {candidate_id: hash} -> profile frame in the order of `hashes`; profiles
+        # extracted with another taxonomy are redone from the stored text first
+        import pandas as pd
+        from core.extract import extract_profile
+        rows = self._rows(hashes.values(), PROFILE_COLS + ["skills_fp"])
+        stale = [h for h, r in rows.items() if r["skills_fp"] != skills.fingerprint]
+        if stale:
+            with span("store.reprofile"):
+                values = [_field_values(extract_profile(rows[h]["clean_text"], skills)) for h in stale]
+                with self._lock:
+                    self._db.executemany(
+                        "UPDATE candidates SET %s, skills_fp=? WHERE hash=?" % ", ".join(f"{c}=?" for c in FIELDS),
+                        [(*v, skills.fingerprint, h) for h, v in zip(stale, values)])
+                    self._db.commit()
+                for h, v in zip(stale, values):
+                    rows[h].update(zip(FIELDS, v))
+        recs = []
+        for cid, h in hashes.items():
+            r = rows.get(h)
+            if r is None:
+                continue
+            rec = {"candidate_id": cid, **{c: r[c] for c in PROFILE_COLS}}
+            rec["skills_found"] = json.loads(r["skills_found"])
+            recs.append(rec)
+        df = pd.DataFrame(recs, columns=["candidate_id"] + PROFILE_COLS)
+        df["cgpa"] = pd.to_numeric(df["cgpa"])
+        df.attrs["hashes"] = [hashes[c] for c in df["candidate_id"]]
+        if self.stats is not None:
+            # no-op for known candidates; picks up re-profiled ones and stores older than the stats file
+            with self._lock:
+                self.stats.add_frame(df)
+                self.stats.save()
+        return df
+
+    def embeddings(self, hashes, clean_texts, embedder, pooling=None):
+        # stored vectors for the current model; the rest (and every TF-IDF row) are encoded now
+        from core.pipeline import encode_texts
+        if not embedder.model:
+            return encode_texts(embedder, clean_texts, pooling)
+        model = _model_key(embedder, pooling)
+        rows = self._rows(hashes, ["model", "embedding"])
+        missing = [i for i, h in enumerate(hashes)
+                   if rows.get(h, {}).get("model") != model or rows[h]["embedding"] is None]
+        if missing:
+            new = np.asarray(encode_texts(embedder, [clean_texts[i] for i in missing], pooling), dtype=np.float32)
+            with self._lock:
+                self._db.executemany(
+                    "UPDATE candidates SET model=?, dim=?, embedding=? WHERE hash=?",
+                    [(model, v.shape[-1], v.tobytes(), hashes[i]) for i, v in zip(missing, new)])
+                self._db.commit()
+            for i, v in zip(missing, new):
+                rows.setdefault(hashes[i], {})["embedding"] = v.tobytes()
+        return np.vstack([np.frombuffer(rows[h]["embedding"], dtype=np.float32) for h in hashes])
+
+    def pool(self, hashes, skills, embedder, pooling=None, rarity="batch"):
+        # {candidate_id: hash} -> CandidatePool ready for rank_pool; rarity="snapshot"
+        # scores skill rarity against self.stats instead of within these candidates
+        from core.ranking import CandidatePool
+        df = self.frame(hashes, skills)
+        emb = self.embeddings(df.attrs["hashes"], df["clean_text"].tolist(), embedder, pooling)
+        snapshot = None
+        if rarity == "snapshot":
+            with self._lock:
+                snapshot = self.stats.snapshot()
+        with span("stage.pool"):
+            return CandidatePool(df, emb, rarity=snapshot)
+
+    def files(self):
+        # {path: hash} for the synced folder, one candidate id per path
+        with self._lock:
+            return dict(self._db.execute("SELECT path, hash FROM files ORDER BY path"))
+
+    def sync(self, root, skills, embedder=None, workers=None, batch_size=500, timeout=30, pooling=None,
+             deduper=None):
+        # Mirror a resume folder: files whose size and mtime are unchanged are not
+        # read, changed or new files are hashed and only unseen content is parsed,
+        # and deleted files are dropped (with their candidates, if nothing else
+        # points to them). Paths are stored relative to `root`. With a Deduper,
+        # unchanged files are fed to it first, so deduper.pairs covers the folder.
+        t0 = time.perf_counter()
+        with self._lock:
+            state = {p: (s, m, h) for p, s, m, h in self._db.execute("SELECT * FROM files")}
+        paths = list_resumes(root)
+        current, changed = set(), []
+        for p in paths:
+            rel = os.path.relpath(p, root)
+            current.add(rel)
+            st = os.stat(p)
+            old = state.get(rel)
+            if old is None or old[0] != st.st_size or old[1] != st.st_mtime_ns:
+                changed.append((rel, p, st.st_size, st.st_mtime_ns))
+        removed = [p for p in state if p not in current]
+        if removed:
+            # duplicates dropped earlier were never stored; what they duplicated may be gone now
+            again = {rel for rel in current if rel in state} - {rel for rel, _, _, _ in changed}
+            stored = self._known(state[rel][2] for rel in again)
+            changed += [(rel, os.path.join(root, rel), *state[rel][:2]) for rel in sorted(again)
+                        if state[rel][2] not in stored]
+        if deduper is not None:
+            skip = {rel for rel, _, _, _ in changed}
+            deduper.filter(self.texts({rel: state[rel][2] for rel in (os.path.relpath(p, root) for p in paths)
+                                       if rel not in skip}))
+
+        parsed = 0
+        for i in range(0, len(changed), batch_size):
+            part = changed[i:i+batch_size]
+            items = []
+            for rel, p, _, _ in part:
+                with open(p, "rb") as fh:
+                    items.append((rel, fh.read()))
+            hashes, n = self._ingest(items, skills, embedder, workers, timeout, pooling, deduper)
+            parsed += n
+            with self._lock:
+                self._db.executemany("INSERT OR REPLACE INTO files VALUES (?,?,?,?)",
+                                     [(rel, size, mtime, hashes[rel]) for rel, _, size, mtime in part])
+                self._db.commit()
+
+        # content that changed or disappeared is dropped unless another file still has it
+        old = {state[p][2] for p in removed} | {state[rel][2] for rel, _, _, _ in changed if rel in state}
+        with self._lock:
+            self._db.executemany("DELETE FROM files WHERE path=?", [(p,) for p in removed])
+            if self.stats is not None:
+                gone = [t for h in old for (t,) in self._db.execute(
+                    "SELECT clean_text FROM candidates WHERE hash=? AND hash NOT IN (SELECT hash FROM files)", (h,))]
+            self._db.executemany("DELETE FROM candidates WHERE hash=? AND hash NOT IN (SELECT hash FROM files)",
+                                 [(h,) for h in old])
+            self._db.commit()
+            if self.stats is not None:
+                for t in gone:
+                    self.stats.remove(text_hash(t))
+                self.stats.save()
+        return {"files": len(paths), "unchanged": len(paths) - len(changed), "changed": len(changed),
+                "parsed": parsed, "removed": len(removed), "seconds": round(time.perf_counter() - t0, 3)}
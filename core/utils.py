@@ -1,41 +1,151 @@
-import io, re, pandas as pd
-from PyPDF2 import PdfReader
-from docx import Document
-def read_pdf(file):
-    text = ""
+import io, os
+from multiprocessing import TimeoutError as PoolTimeout
+from core.profiling import span, count
+# Resumes past these limits are portfolios or scans; the tail adds no signal
+MAX_PDF_PAGES = 12
+MAX_TEXT_CHARS = 60_000
+def _page_has_text(page):
+    # text needs a font, either on the page or inside a form XObject;
+    # scanned pages only carry images, so extract_text() is skipped for them
+    res = page.get("/Resources")
+    if res is None:
+        return True
+    res = res.get_object()
+    if "/Font" in res:
+        return True
+    xobjs = res.get("/XObject")
+    if xobjs is None:
+        return False
+    xobjs = xobjs.get_object()
+    return any(xobjs[k].get_object().get("/Subtype") == "/Form" for k in xobjs)
+def iter_pdf_pages(file, max_pages=MAX_PDF_PAGES):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file)
+    for i, page in enumerate(reader.pages):
+        if max_pages is not None and i >= max_pages:
+            break
+        if _page_has_text(page):
+            count("ingest.pdf_pages")
+            yield page.extract_text() or ""
+        else:
+            count("ingest.pdf_pages_no_text")
+def _bounded(chunks, max_chars, sep=""):
+    parts, total = [], 0
+    for c in chunks:
+        parts.append(c)
+        total += len(c) + len(sep)
+        if max_chars is not None and total >= max_chars:
+            break
+    text = sep.join(parts)
+    return text if max_chars is None else text[:max_chars]
+def read_pdf(file, max_pages=MAX_PDF_PAGES, max_chars=MAX_TEXT_CHARS):
+    parts, total = [], 0
     try:
-        reader = PdfReader(file)
-        for page in reader.pages:
-            text += page.extract_text() or ""
+        # pages are pulled lazily, so reading stops once the character cap is hit
+        for t in iter_pdf_pages(file, max_pages):
+            parts.append(t)
+            total += len(t)
+            if max_chars is not None and total >= max_chars:
+                break
     except Exception:
         pass
-    return text
-def read_docx(file):
+    text = "".join(parts)
+    return text if max_chars is None else text[:max_chars]
+def read_docx(file, max_chars=MAX_TEXT_CHARS):
     try:
+        from docx import Document
         doc = Document(file)
-        return "\n".join([p.text for p in doc.paragraphs])
+        return _bounded((p.text for p in doc.paragraphs), max_chars, "\n")
     except Exception:
         return ""
-def read_txt(file):
+def read_txt(file, max_chars=MAX_TEXT_CHARS):
     try:
-        return file.read().decode("utf-8", errors="ignore")
+        # utf-8 is at most 4 bytes per character
+        data = file.read() if max_chars is None else file.read(4 * max_chars)
+        text = data.decode("utf-8", errors="ignore")
+        return text if max_chars is None else text[:max_chars]
     except Exception:
         return ""
-def extract_texts(files):
+def read_file(name, file, max_chars=MAX_TEXT_CHARS):
+    ext = name.split(".")[-1].lower()
+    count("ingest.docs")
+    if ext=="pdf":
+        with span("ingest.pdf"):
+            return read_pdf(file, max_chars=max_chars)
+    elif ext in ["docx","doc"]:
+        with span("ingest.docx"):
+            return read_docx(file, max_chars)
+    with span("ingest.txt"):
+        return read_txt(file, max_chars)
+def read_bytes(name, data):
+    count("ingest.bytes", len(data))
+    return read_file(name, io.BytesIO(data))
+def _named_bytes(i, f):
+    # (name, bytes) pairs, Streamlit UploadedFile, or any named binary file object
+    if isinstance(f, tuple):
+        return f
+    name = getattr(f, "name", f"resume_{i}")
+    data = f.getvalue() if hasattr(f, "getvalue") else f.read()
+    return name, data
+def extract_texts(files, workers=None, timeout=30):
+    with span("stage.ingest"):
+        if not workers or workers <= 1:
+            out = {}
+            for i,f in enumerate(files):
+                if isinstance(f, tuple):
+                    name, text = f[0], read_bytes(*f)
+                else:
+                    name = getattr(f, "name", f"resume_{i}")
+                    count("ingest.bytes", getattr(f, "size", 0))
+                    text = read_file(name, f)
+                out[name] = text
+            return out
+        return _extract_texts_parallel([_named_bytes(i, f) for i,f in enumerate(files)], workers, timeout)
+def _extract_texts_parallel(items, workers, timeout):
+    # spawn, not fork: the app calls this from a server already running threads.
+    # A reader that hangs past `timeout` gets "" and its pool is killed; files
+    # not finished yet go to a fresh pool, so each hung file costs one timeout.
+    from multiprocessing import get_context
+    ctx = get_context("spawn")
     out = {}
-    for i,f in enumerate(files):
-        name = getattr(f, "name", f"resume_{i}")
-        ext = name.split(".")[-1].lower()
-        if ext=="pdf":
-            text = read_pdf(f)
-        elif ext in ["docx","doc"]:
-            text = read_docx(f)
-        else:
-            text = read_txt(f)
-        out[name] = text
-    return out
+    pending = list(items)
+    while pending:
+        pool = ctx.Pool(processes=min(workers, len(pending)))
+        hung = False
+        try:
+            jobs = [(item, pool.apply_async(read_bytes, item)) for item in pending]
+            pending = []
+            for i, ((name, _), job) in enumerate(jobs):
+                try:
+                    out[name] = job.get(timeout=timeout)
+                except PoolTimeout:
+                    out[name] = ""
+                    hung = True
+                    for item, rest in jobs[i+1:]:
+                        if rest.ready():
+                            out[item[0]] = rest.get() if rest.successful() else ""
+                        else:
+                            pending.append(item)
+                    break
+                except Exception:
+                    out[name] = ""
+        finally:
+            if hung:
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+    return {name: out[name] for name, _ in items}
+RESUME_EXTS = (".pdf", ".docx", ".doc", ".txt")
+def list_resumes(root):
+    paths = []
+    for d, _, files in os.walk(root):
+        for f in files:
+            if f.lower().endswith(RESUME_EXTS):
+                paths.append(os.path.join(d, f))
+    return sorted(paths)
 def load_skills(path):
     with open(path, "r", encoding="utf-8") as fh:
         return [s.strip() for s in fh.readlines() if s.strip()]
 def to_table_download(df):
-    return df.to_csv(index=False).encode("utf-8")
\ No newline at end of file
+    return df.to_csv(index=False).encode("utf-8")
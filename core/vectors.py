@@ -0,0 +1,161 @@
+import json, os
+import numpy as np
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+class EmbeddingStore:
+    # Contiguous on-disk embedding matrix opened with np.memmap, so it can be
+    # larger than RAM and shared read-only between worker processes.
+    #   <path>.vec    n x dim rows in float32, float16 or int8
+    #   <path>.scale  one float32 scale per row (int8 only): v ~= q * scale
+    #   <path>.ids    candidate_id per row, one per line
+    #   <path>.json   dim, dtype, row count
+    # Rows are l2-normalized on add, so dot products are cosine similarities.
+    # An existing store keeps its dim and dtype; passing different ones is an
+    # error (dtype=None accepts whatever it holds, float32 for a new store).
+    def __init__(self, path, dim=None, dtype=None, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        meta = self._read_meta()
+        if meta:
+            self.dim, self.dtype, self.n = meta["dim"], meta["dtype"], meta["n"]
+            if dim is not None and int(dim) != self.dim:
+                raise ValueError(f"embedding store at {path} holds {self.dim}-dim vectors, got dim={dim}")
+            if dtype is not None and dtype != self.dtype:
+                raise ValueError(f"embedding store at {path} holds {self.dtype} vectors, got dtype={dtype!r}")
+        else:
+            if readonly or dim is None:
+                raise FileNotFoundError(f"no embedding store at {path}")
+            dtype = dtype or "float32"
+            if dtype not in DTYPES:
+                raise ValueError(f"dtype must be one of {sorted(DTYPES)}")
+            self.dim, self.dtype, self.n = int(dim), dtype, 0
+            d = os.path.dirname(path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            open(path + ".vec", "wb").close()
+            open(path + ".scale", "wb").close()
+            open(path + ".ids", "w", encoding="utf-8").close()
+            self._write_meta()
+        with open(path + ".ids", "r", encoding="utf-8") as fh:
+            self.ids = [l.rstrip("\n") for l in fh][:self.n]
+        self.row_of = {cid: i for i, cid in enumerate(self.ids)}
+        self._map()
+
+    @classmethod
+    def open(cls, path):
+        return cls(path, readonly=True)
+
+    def _read_meta(self):
+        if not os.path.exists(self.path + ".json"):
+            return None
+        with open(self.path + ".json", "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _write_meta(self):
+        with open(self.path + ".json", "w", encoding="utf-8") as fh:
+            json.dump({"dim": self.dim, "dtype": self.dtype, "n": self.n}, fh)
+
+    def _map(self):
+        mode = "r" if self.readonly else "r+"
+        dt = DTYPES[self.dtype]
+        rows = os.path.getsize(self.path + ".vec") // (np.dtype(dt).itemsize * self.dim)
+        self._vec = np.memmap(self.path + ".vec", dtype=dt, mode=mode, shape=(rows, self.dim)) if rows else None
+        self._scale = None
+        if self.dtype == "int8" and rows:
+            self._scale = np.memmap(self.path + ".scale", dtype=np.float32, mode=mode, shape=(rows,))
+
+    def _reserve(self, need):
+        cap = 0 if self._vec is None else len(self._vec)
+        if need <= cap:
+            return
+        cap = max(need, 2 * cap, 1024)
+        self.flush()
+        self._vec = self._scale = None
+        with open(self.path + ".vec", "r+b") as fh:
+            fh.truncate(cap * self.dim * np.dtype(DTYPES[self.dtype]).itemsize)
+        if self.dtype == "int8":
+            with open(self.path + ".scale", "r+b") as fh:
+                fh.truncate(cap * 4)
+        self._map()
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, cid):
+        return cid in self.row_of
+
+    def _encode(self, v):
+        if self.dtype == "int8":
+            scale = np.abs(v).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            return np.clip(np.rint(v / scale[:, None]), -127, 127).astype(np.int8), scale.astype(np.float32)
+        return v.astype(DTYPES[self.dtype]), None
+
+    def add(self, ids, vectors):
+        if self.readonly:
+            raise PermissionError("embedding store is open read-only")
+        ids = list(ids)
+        v = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        n = np.linalg.norm(v, axis=1, keepdims=True)
+        n[n == 0] = 1
+        q, scale = self._encode(v / n)
+
+        rows, new = [], []
+        for cid in ids:
+            r = self.row_of.get(cid)
+            if r is None:
+                r = self.row_of[cid] = self.n + len(new)
+                new.append(cid)
+            rows.append(r)
+        self._reserve(self.n + len(new))
+        rows = np.array(rows, dtype=np.int64)
+        self._vec[rows] = q
+        if scale is not None:
+            self._scale[rows] = scale
+        if new:
+            with open(self.path + ".ids", "a", encoding="utf-8") as fh:
+                fh.write("".join(f"{cid}\n" for cid in new))
+            self.ids.extend(new)
+            self.n += len(new)
+        self.flush()
+        return rows
+
+    def flush(self):
+        if self._vec is not None and not self.readonly:
+            self._vec.flush()
+            if self._scale is not None:
+                self._scale.flush()
+            self._write_meta()
+
+    def rows(self, ids):
+        return np.array([self.row_of[c] for c in ids], dtype=np.int64)
+
+    def raw(self):
+        # zero-copy view of the stored (possibly quantized) rows
+        return self._vec[:self.n] if self._vec is not None else np.zeros((0, self.dim), DTYPES[self.dtype])
+
+    def get(self, ids=None, rows=None):
+        if rows is None:
+            rows = np.arange(self.n) if ids is None else self.rows(ids)
+        v = np.asarray(self._vec[rows], dtype=np.float32)
+        if self._scale is not None:
+            v *= self._scale[rows][:, None]
+        return v
+
+    def similarity(self, Q, rows=None, chunk=16384):
+        # cosine of stored rows (all, or `rows` in that order) against Q (k x dim),
+        # dequantizing one chunk at a time instead of materializing the matrix
+        Q = np.asarray(Q, dtype=np.float32).reshape(-1, self.dim)
+        qn = np.linalg.norm(Q, axis=1)
+        qn[qn == 0] = 1
+        Q = (Q / qn[:, None]).T
+        m = self.n if rows is None else len(rows)
+        out = np.empty((m, Q.shape[1]), dtype=np.float64)
+        for i in range(0, m, chunk):
+            sel = slice(i, min(m, i + chunk)) if rows is None else rows[i:i+chunk]
+            block = np.asarray(self._vec[sel], dtype=np.float32) @ Q
+            if self._scale is not None:
+                block *= self._scale[sel][:, None]
+            out[i:i+len(block)] = block
+        return out
@@ -0,0 +1,248 @@
+import argparse, asyncio, base64, json, multiprocessing, os, signal, sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.embedding import Embedder, DEFAULT_MODEL
+from core.cache import EmbeddingCache
+from core.batching import MicroBatcher
+from core.skill_extractor import load_skill_index, TAXONOMY_PATH
+from core.ranking import CandidatePool, rank_pool, DEFAULT_WEIGHTS
+from core.rarity import SkillStats
+
+# POST /rank  {"jd": "...", "resumes": [{"id": "a.pdf", "content_b64": "..."} | {"id": "b", "text": "..."}],
+#              "top_k": 10, "weights": {"skills": 0.4}}
+# GET  /health
+# Parsing and profile extraction run on a process pool; resume and JD texts from
+# all in-flight requests go through one MicroBatcher into Embedder.encode.
+# Past max_inflight running + max_queue waiting requests the service answers 503.
+# With --skill-stats, skill rarity is scored against that snapshot (loaded once)
+# instead of within each request's resumes.
+
+RESULT_COLS = ["candidate_id", "final_score", "jd_similarity", "skill_coverage", "skill_rarity_score", "exp_score",
+               "edu_score", "recency_score", "cgpa", "years_experience", "education", "email", "phone",
+               "skills_found", "jd_found_skills", "jd_missing_skills"]
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 503: "Service Unavailable", 504: "Gateway Timeout", 500: "Internal Server Error"}
+
+_SKILLS = None
+
+def _init_worker(taxonomy):
+    global _SKILLS
+    _SKILLS = load_skill_index(taxonomy)
+
+def _profile_items(items):
+    # worker side: (id, text or None, filename, bytes) -> (id, profile dict)
+    from core.utils import read_bytes
+    from core.extract import extract_profile
+    out = []
+    for cid, text, name, data in items:
+        if text is None:
+            text = read_bytes(name, data)
+        out.append((cid, extract_profile(text, _SKILLS).to_dict()))
+    return out
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class RankingService:
+    def __init__(self, args):
+        self.args = args
+        self.skills = load_skill_index(args.taxonomy)
+        self.embedder = Embedder(args.model, cache=None if args.no_cache else EmbeddingCache(args.cache),
+                                 tfidf_path=args.tfidf_state)
+        # spawn, not fork: the event loop process already runs executor threads
+        self.pool = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(args.taxonomy,))
+        self.rarity = SkillStats(args.skill_stats).snapshot() if args.skill_stats else None
+        self.batcher = MicroBatcher(self._encode, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        self.inflight = 0
+        self.running = asyncio.Semaphore(args.max_inflight)
+        self.served = 0
+        self.rejected = 0
+
+    def _encode(self, texts):
+        # request texts are not corpus documents: the TF-IDF fallback scores them
+        # against the persisted state and the service never writes it
+        emb = self.embedder.encode_query(texts)
+        return emb.tocsr() if hasattr(emb, "tocsr") else emb
+
+    async def _profiles(self, resumes):
+        items = []
+        for i, r in enumerate(resumes):
+            if not isinstance(r, dict):
+                raise HTTPError(400, "each resume must be an object")
+            cid = str(r.get("id") or f"resume_{i}")
+            if "text" in r:
+                items.append((cid, str(r["text"]), None, None))
+            elif "content_b64" in r:
+                try:
+                    data = base64.b64decode(r["content_b64"], validate=True)
+                except ValueError:
+                    raise HTTPError(400, f"{cid}: content_b64 is not valid base64")
+                items.append((cid, None, str(r.get("filename") or cid), data))
+            else:
+                raise HTTPError(400, f"{cid}: needs 'text' or 'content_b64'")
+        # split large requests so several workers share them
+        step = max(8, -(-len(items) // self.args.workers))
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(*[loop.run_in_executor(self.pool, _profile_items, items[i:i+step])
+                                       for i in range(0, len(items), step)])
+        return [p for part in parts for p in part]
+
+    async def rank(self, req):
+        import pandas as pd
+        jd = req.get("jd")
+        resumes = req.get("resumes")
+        if not isinstance(jd, str) or not jd.strip():
+            raise HTTPError(400, "'jd' must be a non-empty string")
+        if not isinstance(resumes, list) or not resumes:
+            raise HTTPError(400, "'resumes' must be a non-empty list")
+        if len(resumes) > self.args.max_resumes:
+            raise HTTPError(413, f"at most {self.args.max_resumes} resumes per request")
+        top_k = req.get("top_k")
+        if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+            raise HTTPError(400, "'top_k' must be a positive integer")
+        weights = req.get("weights") or {}
+        if not isinstance(weights, dict) or set(weights) - set(DEFAULT_WEIGHTS):
+            raise HTTPError(400, f"'weights' keys must be among {sorted(DEFAULT_WEIGHTS)}")
+
+        profiles = await self._profiles(resumes)
+        df = pd.DataFrame([{"candidate_id": cid, **p} for cid, p in profiles])
+        emb = await self.batcher.submit(df["clean_text"].tolist() + [jd])
+        loop = asyncio.get_running_loop()
+        pool = CandidatePool(df, emb[:-1], rarity=self.rarity)
+        out = await loop.run_in_executor(None, lambda: rank_pool(
+            pool, jd, self.skills, self.embedder, weights=weights, top_k=top_k, jd_emb=emb[-1:]))
+        out = out[[c for c in RESULT_COLS if c in out.columns]]
+        return {"results": json.loads(out.to_json(orient="records"))}
+
+    def health(self):
+        return {"status": "ok", "backend": "sentence-transformers" if self.embedder.model else "tfidf",
+                "rarity": "batch" if self.rarity is None else "snapshot", "inflight": self.inflight, "served": self.served, "rejected": self.rejected,
+                "batcher": self.batcher.stats()}
+
+    async def dispatch(self, method, path, body):
+        if path == "/health":
+            return 200, self.health()
+        if path != "/rank":
+            raise HTTPError(404, "not found")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        # backpressure: max_inflight run, max_queue wait for a slot, the rest are turned away
+        if self.inflight >= self.args.max_inflight + self.args.max_queue:
+            self.rejected += 1
+            raise HTTPError(503, "server busy, retry later")
+        try:
+            req = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(req, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        self.inflight += 1
+        try:
+            async with self.running:
+                result = await asyncio.wait_for(self.rank(req), self.args.timeout)
+            self.served += 1
+            return 200, result
+        except asyncio.TimeoutError:
+            raise HTTPError(504, "ranking timed out")
+        finally:
+            self.inflight -= 1
+
+    async def handle(self, reader, writer):
+        # minimal HTTP/1.1 with keep-alive; enough for JSON clients and load tests
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, _ = line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                keep = headers.get("connection", "").lower() != "close"
+                try:
+                    size = int(headers.get("content-length") or 0)
+                except ValueError:
+                    size = -1
+                if size < 0:
+                    # the body cannot be framed, so the connection cannot be reused
+                    status, payload, keep = 400, {"error": "invalid Content-Length"}, False
+                elif size > self.args.max_body_mb * 2**20:
+                    status, payload, keep = 413, {"error": "request body too large"}, False
+                else:
+                    body = await reader.readexactly(size) if size else b""
+                    try:
+                        status, payload = await self.dispatch(method, target.split("?", 1)[0], body)
+                    except HTTPError as e:
+                        status, payload = e.status, {"error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                data = json.dumps(payload).encode("utf-8")
+                head = (f"HTTP/1.1 {status} {STATUS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep else 'close'}\r\n")
+                if status == 503:
+                    head += "Retry-After: 1\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + data)
+                await writer.drain()
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(args):
+    svc = RankingService(args)
+    server = await asyncio.start_server(svc.handle, args.host, args.port, backlog=1024)
+    print(f"ranking service on http://{args.host}:{args.port} "
+          f"({svc.health()['backend']}, {args.workers} workers)", file=sys.stderr, flush=True)
+    # SIGTERM/SIGINT stop the server cleanly so the worker processes are shut down too
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await svc.batcher.stop()
+        svc.pool.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP service that ranks resumes against a job description.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="processes for parsing and profiles")
+    ap.add_argument("--max-inflight", type=int, default=16, help="requests ranked concurrently")
+    ap.add_argument("--max-queue", type=int, default=64, help="requests waiting before 503s are returned")
+    ap.add_argument("--max-resumes", type=int, default=1000, help="resumes per request")
+    ap.add_argument("--max-body-mb", type=float, default=64)
+    ap.add_argument("--max-batch", type=int, default=256, help="texts per merged encode call")
+    ap.add_argument("--max-wait-ms", type=float, default=5, help="how long a batch waits for more texts")
+    ap.add_argument("--timeout", type=float, default=120, help="seconds per request")
+    ap.add_argument("--skill-stats", default=None, help="score skill rarity against this SkillStats file")
+    ap.add_argument("--taxonomy", default=TAXONOMY_PATH)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--cache", default=".cache/embeddings.sqlite")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--tfidf-state", default=".cache/tfidf_state.npz")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())